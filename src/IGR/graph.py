@@ -7,8 +7,6 @@
 # The intermediate representation does not check for 
 # errors while being created.
 
-import copy
-
 class Graph(object):
 	def __init__(self):
 		self.subGraphs = []
@@ -28,9 +26,12 @@ class Graph(object):
 	def __iter__(self):
 		return iter(self.subGraphs)
 
-	def addSubGraph(self, sg, name):
+	# Functions are converted in order, a function
+	# should be added before the functions that call it.
+	def addSubGraph(self, sg, name, idx = None):
+		if idx is None: idx = len(self.subGraphs)
 		self.functions.update({name : sg})
-		self.subGraphs.append(sg)
+		self.subGraphs.insert(idx, sg)
 		sg.graph = self
 		sg.func  = sg
 
@@ -58,11 +59,12 @@ class SubGraph(object):
 		self.name  = ''
 		self.func  = None
 
+	# Copy the nodes and ports of this subgraph and of the subgraphs
+	# of its compound nodes. Every node receives a new id.
 	def copy(self):
-		new = copy.deepcopy(self)
-		new.graph = self.graph
-		for node in new:
-			node.id = node.sg.getId()
+		ports = {}
+		new   = cloneSubGraph(self, self.graph, ports)
+		cloneEdges(ports)
 		return new
 
 	def addParSlot(self):
@@ -94,6 +96,61 @@ class SubGraph(object):
 	def __contains__(self, item):
 		return item in self.nodes
 
+# Cloning
+# -------
+
+# The ports of the clone are stored in ports, which maps every
+# original port to its copy. Edges are only added once every
+# port is copied, see cloneEdges.
+
+def clonePort(port, node, ports):
+	new = type(port)(node, port.idx)
+	new.typ = port.typ
+	ports[port] = new
+	return new
+
+def cloneSubGraph(sg, graph, ports):
+	new = SubGraph()
+	new.isRec = sg.isRec
+	new.graph = graph
+	new.args  = sg.args
+	new.name  = sg.name
+	new.func  = new if sg.func is sg else sg.func
+	new.entry = [clonePort(port, new, ports) for port in sg.entry]
+	new.exit  = clonePort(sg.exit, new, ports)
+	for node in sg: cloneNode(node, new, ports)
+	return new
+
+def cloneNode(node, sg, ports):
+	new = object.__new__(type(node))
+	new.__dict__.update(node.__dict__)
+	new.id    = sg.getId()
+	new.sg    = sg
+	new.out   = clonePort(node.out, new, ports)
+	new.ports = [clonePort(port, new, ports) for port in node.ports]
+	sg += new
+
+	if isinstance(node, IfNode):
+		new.thn = cloneSubGraph(node.thn, new, ports)
+		new.els = cloneSubGraph(node.els, new, ports)
+		new.thn.func = new.els.func = sg.func
+	elif isinstance(node, ForNode):
+		new.body = cloneSubGraph(node.body, new, ports)
+		new.body.func = sg.func
+	return new
+
+# Literals are bound to a single port, they are copied
+# but the values they contain are shared.
+def cloneEdges(ports):
+	for port, new in ports.iteritems():
+		if isinstance(port, OutPort):
+			for target in port.targets:
+				dst = ports[target]
+				new.targets.append(dst)
+				dst.src = new
+		elif port.src is not None and port.src.isLit():
+			Literal(port.src.val, port.src.typ).bind(new)
+
 # ----- #
 # Nodes #
 # ----- #
@@ -8,9 +8,12 @@
 
 import dis
 import IGR
+import dvm
 import converter
+import interpreter
 
-from dvm import run
+from interpreter import DISError
+from dvm import DVMError, DVMTimeout
 
 class NodeMap(object):
 	def __init__(self):
@@ -29,9 +32,28 @@ class NodeMap(object):
 	def getDst(self,  key): return self.dstMap[key]
 	def getName(self, key): return self.namMap[key]
 
+def linkNodes(prog, map, nodes):
+	prog.addCommentLine("Collect the results of the linked nodes", 1)
+	arrC, arrK = prog.addInstruction(1, 'OPR', ['array', len(nodes)])
+	idx = 0
+
+	for i in xrange(0, len(nodes)):
+		dstC, dstK = map.getDst(nodes[i])
+		srcC, srcK = map.getSrc(nodes[i])
+
+		for port in xrange(0, nodes[i].args):
+			prog.addLink(0, 0, idx, dstC, dstK, port)
+			idx += 1
+		prog.addLink(srcC, srcK, 0, arrC, arrK, i)
+
+	prog.linkStop(arrC, arrK)
+
 def convert(graph, entry = 'main', linkTo = None):
 	main = graph[entry]
-	args = main.args if not linkTo else linkTo.args
+
+	if   isinstance(linkTo, list): args = sum([n.args for n in linkTo])
+	elif linkTo:                   args = linkTo.args
+	else:                          args = main.args
 
 	if args == 0: return "TRIV <= %s" % main.exit.src.val
 
@@ -39,7 +61,9 @@ def convert(graph, entry = 'main', linkTo = None):
 	map  = NodeMap()
 	converter.subGraphs(graph, prog, map)
 
-	if linkTo:
+	if isinstance(linkTo, list):
+		linkNodes(prog, map, linkTo)
+	elif linkTo:
 		dstC, dstK = map.getDst(linkTo)
 		srcC, srcK = map.getSrc(linkTo)
 		prog.linkStart(dstC, dstK)
@@ -51,3 +75,11 @@ def convert(graph, entry = 'main', linkTo = None):
 		prog.linkStart(callC, callK)
 
 	return prog.generate()
+
+def run(inputs, dis, external = False):
+	if external: return dvm.run(inputs, dis)
+	else:        return interpreter.run(inputs, dis)
+
+def evaluate(inputs, dis, external = False, timeout = None):
+	if external: return interpreter.parseValue(dvm.run(inputs, dis, timeout))
+	else:        return interpreter.evaluate(inputs, dis)
@@ -3,22 +3,39 @@
 # DLC
 
 # This module is responsible for the interaction
-# with DVM
+# with DVM. Programs are executed by a shared pool
+# of DVM workers, which is created when it is first used.
 
-import sys
-import subprocess
+import os
+import atexit
+import pool as _pool
 
-def run(inputs, dis):
-	args = ['dvm', "-"]
+from pool import DVMError, DVMTimeout
 
-	for e in inputs:
-		args.append("-i")
-		args.append(str(e))
+path    = os.environ.get('DVM', 'dvm')
+workers = 4
+pool    = None
 
-	dvm = subprocess.Popen(args, stdout=subprocess.PIPE, stdin=subprocess.PIPE)
-	res = dvm.communicate(dis)
-	ret = dvm.returncode
+def close():
+	global pool
+	if pool: pool.close()
+	pool = None
 
-	if ret:
-		print >> sys.stderr, "DVM returned non-zero return code", ret
-	return res[0].strip()
\ No newline at end of file
+def setup(dvmPath = None, workerAmount = None):
+	global path, workers
+	if dvmPath:      path    = dvmPath
+	if workerAmount: workers = workerAmount
+	close()
+
+def getPool():
+	global pool
+	if pool is None: pool = _pool.Pool(workers, path)
+	return pool
+
+def submit(inputs, dis, timeout = None):
+	return getPool().submit(inputs, dis, timeout)
+
+def run(inputs, dis, timeout = None):
+	return getPool().run(inputs, dis, timeout)
+
+atexit.register(close)
@@ -0,0 +1,266 @@
+# interpreter.py
+# Mathijs Saey
+# DLC
+
+# This module contains a python interpreter for DIS.
+# It understands every instruction the backend generates,
+# which allows us to execute a program without starting DVM.
+
+import ast
+import collections
+import operations
+
+class DISError(Exception): pass
+
+# ------- #
+# Parsing #
+# ------- #
+
+class Instruction(object):
+	def __init__(self, type, args):
+		self.type     = type
+		self.args     = args
+		self.links    = {}
+		self.literals = {}
+
+	def addLink(self, port, dst):
+		self.links.setdefault(port, []).append(dst)
+
+class Program(object):
+	def __init__(self):
+		self.instructions = {}
+		self.trivial      = None
+		self.isTrivial    = False
+
+	def __getitem__(self, addr):
+		try:
+			return self.instructions[addr]
+		except KeyError:
+			raise DISError("Unknown instruction %d %d" % addr)
+
+def parseValue(str):
+	str = str.strip()
+	if   str == 'true':  return True
+	elif str == 'false': return False
+
+	try:
+		return ast.literal_eval(str)
+	except (ValueError, SyntaxError):
+		return str
+
+# Values are written the way DVM prints them
+def formatValue(val):
+	if   val is True:  return 'true'
+	elif val is False: return 'false'
+	elif isinstance(val, list):
+		return '[%s]' % ', '.join([formatValue(el) for el in val])
+	else: return str(val)
+
+def parseInstruction(prog, chunk, words, line):
+	type = words[1]
+	key  = int(words[2])
+
+	if type == 'CNS':
+		args = [parseValue(line.split('<=', 1)[1])]
+	elif type == 'OPR':
+		args = [words[3], int(words[4])]
+	else:
+		args = [int(w) for w in words[3:]]
+
+	prog.instructions[(chunk, key)] = Instruction(type, args)
+
+def parse(dis):
+	prog  = Program()
+	chunk = 0
+
+	for line in dis.splitlines():
+		line  = line.strip()
+		words = line.split()
+
+		if not words or line.startswith('$'): continue
+		elif words[0] == 'CHUNK':
+			chunk = int(words[1])
+		elif words[0] == 'INST':
+			parseInstruction(prog, chunk, words, line)
+		elif words[0] == 'LINK':
+			src = (int(words[1]), int(words[2]))
+			dst = (int(words[5]), int(words[6]), int(words[7]))
+			prog[src].addLink(int(words[3]), dst)
+		elif words[0] == 'LITR':
+			val = parseValue(line.split('<=', 1)[1])
+			prog[(chunk, int(words[1]))].literals[int(words[2])] = val
+		elif words[0] == 'TRIV':
+			prog.isTrivial = True
+			prog.trivial   = parseValue(line.split('<=', 1)[1])
+		else:
+			raise DISError("Unknown statement: '%s'" % line)
+
+	return prog
+
+# --------- #
+# Execution #
+# --------- #
+
+class Context(object):
+	def __init__(self, parent, ret, idx = None):
+		self.parent = parent
+		self.ret    = ret
+		self.idx    = idx
+
+class Interpreter(object):
+	def __init__(self, prog):
+		self.prog   = prog
+		self.queue  = collections.deque()
+		self.state  = {}
+		self.done   = False
+		self.result = None
+
+		self.handlers = {
+			'STP' : self.stop,
+			'SNK' : self.sink,
+			'RST' : self.restore,
+			'CNS' : self.constant,
+			'OPR' : self.operation,
+			'CHN' : self.change,
+			'SWI' : self.switch,
+			'SPL' : self.split
+		}
+
+	# Tokens
+	# ------
+
+	def send(self, ctx, addr, port, value):
+		self.queue.append((ctx, addr, port, value))
+
+	def emit(self, ctx, addr, port, value):
+		for (chunk, key, dst) in self.prog[addr].links.get(port, []):
+			self.send(ctx, (chunk, key), dst, value)
+
+	def collect(self, ctx, addr, port, value, size):
+		key  = (ctx, addr)
+		vals = self.state.get(key)
+		if vals is None:
+			vals = dict(self.prog[addr].literals)
+			self.state[key] = vals
+
+		vals[port] = value
+		if len(vals) < size: return None
+
+		del self.state[key]
+		return [vals[i] for i in xrange(0, size)]
+
+	# Instructions
+	# ------------
+
+	def stop(self, ctx, addr, inst, port, value):
+		self.result = value
+		self.done   = True
+
+	def sink(self, ctx, addr, inst, port, value):
+		self.emit(ctx, addr, port, value)
+
+	def constant(self, ctx, addr, inst, port, value):
+		self.emit(ctx, addr, 0, inst.args[0])
+
+	def restore(self, ctx, addr, inst, port, value):
+		if ctx.idx is None:
+			self.send(ctx.parent, ctx.ret, 0, value)
+		else:
+			self.merge(ctx.parent, ctx.ret, ctx.idx, value)
+
+	def operation(self, ctx, addr, inst, port, value):
+		op, args = inst.args
+		vals = self.collect(ctx, addr, port, value, args)
+		if vals is None: return
+		self.emit(ctx, addr, 0, operations.apply(op, vals))
+
+	def change(self, ctx, addr, inst, port, value):
+		args, binds, dstC, dstK, retC, retK = inst.args
+		vals = self.collect(ctx, addr, port, value, args)
+		if vals is None: return
+
+		new = Context(ctx, (retC, retK))
+		for i in xrange(0, args):
+			self.send(new, (dstC, dstK), i, vals[i])
+
+	def switch(self, ctx, addr, inst, port, value):
+		key   = (ctx, addr)
+		state = self.state.get(key)
+		if state is None:
+			state = [None, inst.literals.items()]
+			self.state[key] = state
+
+		state[1].append((port, value))
+		if state[0] is None:
+			for (p, v) in state[1]:
+				if p == 0: state[0] = int(v)
+		if state[0] is None: return
+
+		dst = (inst.args[2 * state[0]], inst.args[2 * state[0] + 1])
+		for (p, v) in state[1]:
+			self.send(ctx, dst, p, v)
+		state[1] = []
+
+	def split(self, ctx, addr, inst, port, value):
+		args, dstC, dstK, mrgC, mrgK = inst.args
+		vals = self.collect(ctx, addr, port, value, args)
+		if vals is None: return
+
+		arr = vals[0]
+		mrg = (mrgC, mrgK)
+
+		if not arr:
+			return self.emit(ctx, mrg, 0, [])
+
+		self.state[(ctx, mrg)] = [len(arr), [None] * len(arr)]
+		for idx in xrange(0, len(arr)):
+			new = Context(ctx, mrg, idx)
+			self.send(new, (dstC, dstK), 0, arr[idx])
+			for i in xrange(1, args):
+				self.send(new, (dstC, dstK), i, vals[i])
+
+	def merge(self, ctx, addr, idx, value):
+		state = self.state[(ctx, addr)]
+		state[1][idx] = value
+		state[0] -= 1
+
+		if state[0] == 0:
+			del self.state[(ctx, addr)]
+			self.emit(ctx, addr, 0, state[1])
+
+	# Main loop
+	# ---------
+
+	def step(self):
+		ctx, addr, port, value = self.queue.popleft()
+		inst = self.prog[addr]
+		self.handlers[inst.type](ctx, addr, inst, port, value)
+
+	def run(self, inputs):
+		if self.prog.isTrivial: return self.prog.trivial
+
+		root = Context(None, None)
+		for i in xrange(0, len(inputs)):
+			self.emit(root, (0, 0), i, inputs[i])
+
+		while self.queue and not self.done:
+			self.step()
+
+		if not self.done:
+			raise DISError("Program stopped without producing a result")
+		return self.result
+
+# ---------- #
+# Entrypoint #
+# ---------- #
+
+def parseInput(val):
+	if isinstance(val, basestring): return parseValue(val)
+	else: return val
+
+def evaluate(inputs, dis):
+	inputs = [parseInput(val) for val in inputs]
+	return Interpreter(parse(dis)).run(inputs)
+
+def run(inputs, dis):
+	return formatValue(evaluate(inputs, dis))
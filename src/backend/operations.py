@@ -0,0 +1,53 @@
+# operations.py
+# Mathijs Saey
+# DLC
+
+# This module contains the python implementation
+# of the operations that can be used in an OPR instruction.
+# The implementations follow DVM, which is written in C++:
+# integer division truncates towards zero and arrays
+# are not indexed from the end.
+
+integers = (int, long)
+
+def div(a, b):
+	if isinstance(a, integers) and isinstance(b, integers):
+		res = abs(a) // abs(b)
+		return res if (a < 0) == (b < 0) else -res
+	return a / b
+
+def arrGet(arr, idx):
+	if not 0 <= idx < len(arr):
+		raise IndexError("Index %s out of range" % idx)
+	return arr[idx]
+
+operations = {
+	'add'    : lambda a, b : a + b,
+	'sub'    : lambda a, b : a - b,
+	'mul'    : lambda a, b : a * b,
+	'div'    : div,
+
+	'less'   : lambda a, b : a <  b,
+	'lessEq' : lambda a, b : a <= b,
+	'more'   : lambda a, b : a >  b,
+	'moreEq' : lambda a, b : a >= b,
+	'equals' : lambda a, b : a == b,
+	'notEq'  : lambda a, b : a != b,
+
+	'and'    : lambda a, b : a and b,
+	'or'     : lambda a, b : a or b,
+	'not'    : lambda a    : not a,
+	'neg'    : lambda a    : -a,
+	'int'    : lambda a    : int(a),
+
+	'array'  : lambda *els    : list(els),
+	'arrGet' : arrGet,
+	'range'  : lambda a, b     : range(a, b + 1),
+	'arrLen' : lambda arr      : len(arr)
+}
+
+def has(op):
+	return op in operations
+
+def apply(op, args):
+	return operations[op](*args)
@@ -0,0 +1,176 @@
+# pool.py
+# Mathijs Saey
+# DLC
+
+# This module contains a pool of DVM workers.
+# Programs and their inputs are submitted to the pool,
+# which distributes them over a fixed amount of workers.
+# Every submission returns a future, which makes it possible
+# to run many programs at the same time.
+
+# DVM reads a single program from stdin and stops once it
+# is finished, a worker therefore starts a fresh DVM process
+# for every program it executes. Executions that crash or
+# that return a non-zero exit code are retried on a new process.
+# Executions that take longer than their timeout are killed.
+
+import Queue
+import threading
+import subprocess
+
+from interpreter import formatValue
+
+try:
+	from concurrent.futures import Future, TimeoutError
+except ImportError:
+	Future = None
+	class TimeoutError(Exception): pass
+
+class DVMError(Exception): pass
+class DVMTimeout(DVMError): pass
+
+# ------- #
+# Futures #
+# ------- #
+
+# Minimal stand in for concurrent.futures.Future,
+# only used when the futures module is not available.
+class SimpleFuture(object):
+	def __init__(self):
+		self._done      = threading.Event()
+		self._result    = None
+		self._exception = None
+
+	def set_running_or_notify_cancel(self):
+		return True
+
+	def set_result(self, result):
+		self._result = result
+		self._done.set()
+
+	def set_exception(self, exception):
+		self._exception = exception
+		self._done.set()
+
+	def done(self):
+		return self._done.is_set()
+
+	def wait(self, timeout):
+		if not self._done.wait(timeout):
+			raise TimeoutError("Future did not finish within %s seconds" % timeout)
+
+	def exception(self, timeout = None):
+		self.wait(timeout)
+		return self._exception
+
+	def result(self, timeout = None):
+		self.wait(timeout)
+		if self._exception: raise self._exception
+		return self._result
+
+def createFuture():
+	if Future: return Future()
+	else:      return SimpleFuture()
+
+# ------- #
+# Workers #
+# ------- #
+
+class Worker(threading.Thread):
+	def __init__(self, pool):
+		super(Worker, self).__init__()
+		self.daemon = True
+		self.pool   = pool
+
+	def launch(self, inputs, dis, timeout):
+		args = [self.pool.path, '-'] + self.pool.args
+		for e in inputs:
+			args.append("-i")
+			args.append(formatValue(e))
+
+		try:
+			dvm = subprocess.Popen(args,
+				stdout = subprocess.PIPE,
+				stderr = subprocess.PIPE,
+				stdin  = subprocess.PIPE)
+		except OSError, e:
+			raise DVMError("Could not start %s: %s" % (self.pool.path, e))
+
+		timer = None
+		if timeout is not None:
+			timer = threading.Timer(timeout, dvm.kill)
+			timer.start()
+
+		out, err = dvm.communicate(dis)
+
+		if timer and not timer.is_alive():
+			raise DVMTimeout("DVM did not finish within %s seconds" % timeout)
+		elif timer:
+			timer.cancel()
+
+		if dvm.returncode:
+			raise DVMError("DVM returned non-zero return code %d: %s" % (
+				dvm.returncode, err.strip()))
+		return out.strip()
+
+	def execute(self, inputs, dis, timeout, future):
+		if not future.set_running_or_notify_cancel(): return
+		error = None
+
+		for attempt in xrange(0, self.pool.retries + 1):
+			try:
+				return future.set_result(self.launch(inputs, dis, timeout))
+			except DVMTimeout, e:
+				return future.set_exception(e)
+			except DVMError, e:
+				error = e
+			except Exception, e:
+				return future.set_exception(e)
+
+		future.set_exception(error)
+
+	def run(self):
+		while True:
+			job = self.pool.queue.get()
+			if job is None: return
+			self.execute(*job)
+
+# ---- #
+# Pool #
+# ---- #
+
+class Pool(object):
+	def __init__(self, workers = 4, path = 'dvm', args = [], retries = 1):
+		self.path    = path
+		self.args    = list(args)
+		self.retries = retries
+		self.queue   = Queue.Queue()
+		self.closed  = False
+		self.workers = [Worker(self) for i in xrange(0, workers)]
+
+		for worker in self.workers: worker.start()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, type, value, traceback):
+		self.close()
+
+	def submit(self, inputs, dis, timeout = None):
+		if self.closed: raise RuntimeError("Cannot submit to a closed pool")
+		future = createFuture()
+		self.queue.put((inputs, dis, timeout, future))
+		return future
+
+	def map(self, jobs, timeout = None):
+		futures = [self.submit(inputs, dis, timeout) for (inputs, dis) in jobs]
+		return [future.result() for future in futures]
+
+	def run(self, inputs, dis, timeout = None):
+		return self.submit(inputs, dis, timeout).result()
+
+	def close(self):
+		self.closed = True
+		for worker in self.workers: self.queue.put(None)
+		for worker in self.workers: worker.join()
+		self.workers = []
@@ -23,6 +23,16 @@ import optimize
 argParser = argparse.ArgumentParser(description = "The DFL Compiler")
 argParser.add_argument("path", nargs = '?', default = '-', help = "The path to the file you want to compile.")
 argParser.add_argument("--dot", action = "store_true", help = "Generate a dot graph of the program")
+argParser.add_argument("-O", dest = "level", type = int, default = 2, choices = range(0, 4), help = "Optimization level, -O0 only folds constants")
+argParser.add_argument("--passes", help = "Comma separated list of passes to run instead of the optimization level, passes between brackets are repeated until they no longer change the program")
+argParser.add_argument("--dvm", action = "store_true", help = "Use DVM to evaluate constant expressions")
+argParser.add_argument("--no-cache", action = "store_true", help = "Do not cache the results of constant expressions")
+argParser.add_argument("--fold-steps", type = int, default = 100000, help = "Maximum amount of steps to evaluate a constant expression")
+argParser.add_argument("--fold-time", type = float, default = 1.0, help = "Maximum amount of seconds to evaluate a constant expression")
+argParser.add_argument("--fold-size", type = int, default = 10000, help = "Maximum size of an array (in elements) or integer (in 64 bit words) created by a constant expression")
+argParser.add_argument("--inline-cost", type = int, default = 3, help = "Amount of nodes a call is worth when deciding to inline a function")
+argParser.add_argument("--inline-growth", type = float, default = 0.5, help = "Fraction by which inlining may grow the program")
+argParser.add_argument("--report", action = "store_true", help = "Print a compilation report to stderr")
 args = argParser.parse_args()
 
 # ------------------- #
@@ -44,7 +54,21 @@ except frontend.Error:
 	sys.exit(1)
 
 if args.dot: IGR.dot(graph, path = "pre.dot")
-optimize.run(graph)
+cache  = None if args.no_cache else optimize.Cache()
+report = optimize.Report()
+budget = optimize.Budget(args.fold_steps, args.fold_time, args.fold_size)
+
+try:
+	pipeline = optimize.parse(args.passes) if args.passes else None
+except ValueError, e:
+	argParser.error(e)
+
+optimize.run(graph, 
+	level = args.level, pipeline = pipeline,
+	inlineCost = args.inline_cost, inlineGrowth = args.inline_growth,
+	dvm = args.dvm, cache = cache, budget = budget, report = report)
+if cache: cache.save()
+if args.report: print >> sys.stderr, report
 if args.dot: IGR.dot(graph, path = "post.dot")
 
 dis = backend.convert(graph)
@@ -4,14 +4,100 @@
 
 # This package contains the optimizations 
 
+# The optimizations are registered with the pass manager,
+# the pipeline that is used depends on the optimization level.
+
 import cse   as _cse
+import licm  as _licm
+import sccp  as _sccp
+import unroll as _unroll
 import prune as _prune
+import algebra as _algebra
+import deadargs as _deadargs
+import ipcp as _ipcp
+import fusion as _fusion
+import shape as _shape
+import specialise as _specialise
 import autoinline
+import callgraph
 import constants
+import manager
+
+from cache    import Cache
+from report   import Report
+from evaluate import Budget
+from manager  import Group, Options, parse
+
+# ------ #
+# Passes #
+# ------ #
+
+manager.register('constants', lambda g, o : constants.remove(
+	g, o.dvm, o.batch, o.cache, o.budget, o.report, o.failed))
+manager.register('sccp',     lambda g, o : _sccp.propagate(g, o.budget))
+manager.register('algebra',  lambda g, o : _algebra.simplifyAll(g))
+manager.register('shape',    lambda g, o : _shape.fold(g))
+manager.register('unroll',   lambda g, o : o.unroll and _unroll.unroll(g, o.unroll))
+manager.register('cse',      lambda g, o : _cse.eliminate(g))
+manager.register('licm',     lambda g, o : _licm.hoist(g))
+manager.register('prune',    lambda g, o : _prune.prune(g))
+manager.register('deadargs', lambda g, o : _deadargs.eliminate(g))
+manager.register('ipcp',     lambda g, o : _ipcp.propagate(g))
+manager.register('fusion',   lambda g, o : _fusion.fuse(g))
+manager.register('inline',   lambda g, o : autoinline.inline(
+	g, o.inlineCost, o.inlineGrowth, o.report, o.inlineBudget))
+manager.register('specialise', lambda g, o : _specialise.specialise(
+	g, o.specialise))
+manager.register('sweep',    lambda g, o : callgraph.CallGraph(g).sweep() != [])
+
+# ------ #
+# Levels #
+# ------ #
+
+def fold(): return Group('fold', ['constants', 'sccp', 'algebra', 'shape', 'unroll'])
+
+# Nodes which only accept literals are never triggered in DIS,
+# constant folding is therefore performed at every level.
+def preset(level):
+	if level <= 0: return ['constants']
+	elif level == 1: return [fold(), 'prune', 'sweep']
+
+	steps = [
+		fold(), 'cse', 'licm', 'prune',
+		'inline', 'ipcp', 'specialise', 'fusion', fold(), 'prune',
+		Group('args', ['deadargs', 'prune']), 'sweep'
+	]
+
+	if level == 2: return steps
+	else: return [Group('all', steps, limit = 4)]
+
+def run(graph, 
+	level = 2, pipeline = None,
+	inline = True, prune = True, cse = True, licm = True, sccp = True, 
+	algebra = True, deadargs = True, ipcp = True, fusion = True,
+	shape = True, sweep = True, unroll = 8, specialise = 4,
+	inlineCost = 3, inlineGrowth = 0.5,
+	dvm = False, batch = True, cache = None, budget = None, report = None):
+
+	if pipeline is None: pipeline = preset(level)
+	elif isinstance(pipeline, str): pipeline = parse(pipeline)
+
+	flags = {
+		'inline'   : inline,   'prune'      : prune,      'cse'  : cse, 
+		'licm'     : licm,     'sccp'       : sccp,
+		'algebra'  : algebra,  'unroll'     : unroll,
+		'deadargs' : deadargs, 'specialise' : specialise,
+		'ipcp'     : ipcp,     'fusion'     : fusion,
+		'shape'    : shape,    'sweep'      : sweep
+	}
 
-def run(graph, inline = True, prune = True, cse = True):
-	constants.remove(graph)
+	skip    = [name for name, flag in flags.iteritems() if not flag]
+	report  = report or Report()
+	options = Options(
+		unroll = unroll, specialise = specialise,
+		inlineCost = inlineCost, inlineGrowth = inlineGrowth,
+		inlineBudget = autoinline.GrowthBudget(graph, inlineGrowth),
+		dvm = dvm, batch = batch, cache = cache, budget = budget, report = report,
+		failed = set())
 
-	if cse:    _cse.eliminate(graph)
-	if prune:  _prune.prune(graph)
-	if inline: autoinline.inline(graph, 2)
\ No newline at end of file
+	return manager.Manager(pipeline, options, skip, report).run(graph)
@@ -0,0 +1,93 @@
+# algebra.py
+# Mathijs Saey
+# DLC
+
+# This module simplifies operations with algebraic identities,
+# such as x + 0, x * 1, x - x or not not x. These operations are
+# replaced by the operand that survives, or by a literal. The
+# simplified nodes lose their targets and are removed by prune.
+
+import IGR
+
+from worklist import Worklist
+
+numbers = (int, long, float)
+
+def isNum(port, val):
+	src = port.src
+	return src.isLit() and type(src.val) in numbers and src.val == val
+
+def isBool(port, val):
+	src = port.src
+	return src.isLit() and src.val is val
+
+def isSame(node):
+	p1, p2 = node.ports
+	return not p1.hasLit() and p1.src is p2.src
+
+# Source of the operand of an operation which
+# is the input of a node with the same operation.
+def inner(node):
+	src = node[0].src
+	if src.isLit() or not isinstance(src.node, IGR.OperationNode): return None
+	if src.node.op == node.op: return src.node[0].src
+
+# Operations with one operand that matches,
+# the other operand is the result.
+identities = {
+	'add' : lambda p : isNum(p, 0),
+	'mul' : lambda p : isNum(p, 1),
+	'and' : lambda p : isBool(p, True),
+	'or'  : lambda p : isBool(p, False)
+}
+
+# Operations with one operand that matches, which
+# is also the result of the operation.
+absorbing = {
+	'mul' : lambda p : isNum(p, 0),
+	'and' : lambda p : isBool(p, False),
+	'or'  : lambda p : isBool(p, True)
+}
+
+# Results of comparing an operand with itself
+reflexive = {
+	'sub'    : 0,
+	'equals' : True,
+	'notEq'  : False,
+	'less'   : False,
+	'more'   : False,
+	'lessEq' : True,
+	'moreEq' : True
+}
+
+# Source which produces the result of node, None if
+# the node can not be simplified.
+def simplify(node):
+	if node.op in ('not', 'neg'):
+		return inner(node)
+	elif node.args != 2 or None in [port.src for port in node.ports]:
+		return None
+
+	p1, p2 = node.ports
+
+	if node.op in ('sub', 'div') and isNum(p2, 0 if node.op == 'sub' else 1):
+		return p1.src
+	elif node.op in reflexive and isSame(node):
+		val = reflexive[node.op]
+		return IGR.Literal(val, type(val))
+
+	for a, b in ((p1, p2), (p2, p1)):
+		if node.op in identities and identities[node.op](b): return a.src
+		if node.op in absorbing and absorbing[node.op](b): return b.src
+
+class Simplifier(Worklist):
+	def accepts(self, node):
+		return node.isOp()
+
+	def node(self, node):
+		if not node.out.targets: return
+		res = simplify(node)
+		if res is not None: self.replace(node, res)
+
+def simplifyAll(graph):
+	return Simplifier().runGraph(graph)
@@ -2,66 +2,105 @@
 # Mathijs Saey
 # DLC
 
-# This optimization autmatically inlines non-recursive
-# functions that match one of the following properties:
-#	- They return a constant
-#	- They are called less than a given threshold
+# This optimization autmatically inlines non-recursive functions.
 # The optimization also removes unused subgraphs from the program.
 
-import IGR
-
-def node(node, dct):
-	if node.isCall() and not node.isRec:
-		lst = dct[node.name]
-		lst.append(node)
-		dct.update({node.name : lst})
-
-def findCalls(graph, dct):
-	IGR.traverse(
-		graph,
-		lambda x : node(x, dct),
-		lambda x : None,
-		lambda x : None,
-		lambda x : None,
-		lambda x : None
-	)
-
-def insert(sg, node):
-	sg = sg.copy()
-	node.sg.nodes += sg.nodes
-
-	out = sg.exit.src
-	out.removeBound(sg.exit)
-	out.bindMany(node.out.targets)
-
-	for i in xrange(0, node.args):
-		port = sg.entry[i]
-
-		for target in port:
-			node[i].src.bind(target)
-		node[i].src.removeBound(node[i])
-
-	node.remove()
-
-def checkCalls(graph, dct, threshold):
-	didChange = False
-	for (name, lst) in dct.iteritems():
-		if   name == 'main': continue
-		elif len(lst) == 0: 
-			graph.delSubGraph(name)
-			didChange = True
-
-		elif graph[name].isRec: continue
-
-		elif len(lst) <= threshold or graph[name].args is 0:
-			for node in lst: 
-				insert(graph[name], node)
-				didChange = True
-
-	return didChange
-
-def inline(graph, threshold):
-	while True:
-		callDct = {key : [] for key in graph.functions.iterkeys()}
-		findCalls(graph, callDct)
-		if not checkCalls(graph, callDct, threshold): return
+# Whether or not a function is inlined is decided by a cost model.
+# Every call costs a CHN instruction in the caller and a SNK and
+# RST instruction in the callee, inlining a call saves this overhead
+# but duplicates the nodes of the callee. Once every call is inlined
+# the callee itself is removed. A function is inlined when:
+#	- It does not accept any arguments (it returns a constant)
+#	- Inlining every call does not grow the program
+#	- The growth fits in the remaining growth budget, which is
+#	  a fraction of the size of the program before inlining.
+#	  The budget is shared by every run of the pass.
+# Every decision is added as a note to the report.
+
+# Functions are handled bottom-up according to the strongly
+# connected components of the call graph: the calls inside a
+# function are inlined before the function itself is inlined.
+# Functions which are part of a cycle in the call graph
+# are never inlined.
+
+from splice    import move, detach
+from callgraph import CallGraph, callNodes
+from report    import Report
+
+def size(sg):
+	res = 0
+	for node in sg:
+		res += 1
+		if node.isCompound():
+			for inner in node: res += size(inner)
+	return res
+
+def insert(sg, node, calls):
+	body = sg.copy()
+	new  = callNodes(body)
+	res  = move(body, node.sg, [port.src for port in node.ports])
+	res.bindMany(node.out.targets)
+	detach(node)
+
+	calls.removeCall(node)
+	for call in new: calls.addCall(call)
+
+class GrowthBudget(object):
+	def __init__(self, graph, growth):
+		self.left = int(growth * sum([size(sg) for sg in graph]))
+
+class Inliner(object):
+	def __init__(self, graph, cost, budget, report):
+		self.graph  = graph
+		self.calls  = CallGraph(graph)
+		self.cost   = cost
+		self.budget = budget
+		self.report = report
+
+	def decide(self, name):
+		sg  = self.graph[name]
+		lst = self.calls.callers(name)
+
+		if self.calls.isRecursive(name): return False, 0, 'recursive'
+		if sg.args == 0: return True, 0, 'constant'
+
+		growth = size(sg) * (len(lst) - 1) - self.cost * len(lst)
+		if growth <= 0: return True, growth, 'no growth'
+		elif growth <= self.budget.left: return True, growth, 'within budget'
+		else: return False, growth, 'exceeds budget %d' % self.budget.left
+
+	def function(self, name):
+		lst = list(self.calls.callers(name))
+		if name == 'main' or not lst: return False
+
+		res, growth, reason = self.decide(name)
+		self.report.note('inline %s (%d calls, size %d, growth %d): %s, %s' % (
+			name, len(lst), size(self.graph[name]), growth,
+			'inlined' if res else 'skipped', reason))
+
+		if not res:
+			self.report.count('inline.skipped')
+			return False
+
+		self.budget.left -= max(growth, 0)
+		for node in lst: insert(self.graph[name], node, self.calls)
+		self.report.count('inline.inlined', len(lst))
+		return True
+
+	# Unreachable functions are removed before inlining,
+	# which avoids inlining calls in functions that are removed.
+	def run(self):
+		didChange = False
+		removed   = self.calls.sweep()
+
+		for scc in self.calls.analyse():
+			for name in scc:
+				didChange = self.function(name) or didChange
+
+		removed += self.calls.sweep()
+		self.report.count('inline.removed', len(removed))
+		return removed != [] or didChange
+
+def inline(graph, cost = 3, growth = 0.5, report = None, budget = None):
+	if budget is None: budget = GrowthBudget(graph, growth)
+	return Inliner(graph, cost, budget, report or Report()).run()
@@ -0,0 +1,134 @@
+# cache.py
+# Mathijs Saey
+# DLC
+
+# This module contains a persistent cache for the results
+# of compile time evaluations. Results are stored under a hash
+# of the evaluated code and its literal inputs, which allows
+# them to be reused across compilations.
+# The least recently used results are dropped once the cache
+# grows beyond its size.
+
+import os
+import json
+import hashlib
+import tempfile
+import collections
+
+import IGR
+
+# ---------- #
+# Signatures #
+# ---------- #
+
+def portSig(port, index):
+	src = port.src
+	if   src is None: return '_'
+	elif src.isLit(): return 'L%r' % (src.val,)
+	elif isinstance(src.node, IGR.SubGraph): return 'E%d' % src.idx
+	else: return 'N%d' % index[src.node]
+
+def nodeSig(node, index, calls):
+	if node.isOp():
+		head = 'O%s' % node.op
+	elif node.isCall():
+		head = 'C%s' % node.name
+		calls.add(node.name)
+	elif node.isCompound():
+		subs = ','.join([sgSig(sg, calls) for sg in node])
+		head = '%s{%s}' % (type(node).__name__, subs)
+	else:
+		head = 'K%r' % (node.val,)
+
+	ports = ','.join([portSig(port, index) for port in node.ports])
+	return '%s(%s)' % (head, ports)
+
+def sgSig(sg, calls):
+	index = {node : i for i, node in enumerate(sg.nodes)}
+	nodes = ';'.join([nodeSig(node, index, calls) for node in sg])
+	return '[%d|%s|%s]' % (sg.args, nodes, portSig(sg.exit, index))
+
+def funcSig(graph, name, sigs):
+	if name not in sigs:
+		calls = set()
+		sigs[name] = (sgSig(graph[name], calls), calls)
+	return sigs[name]
+
+# The key of a node contains the node, its inputs and
+# the body of every function it may end up calling.
+def key(node, sigs = None):
+	if sigs is None: sigs = {}
+
+	graph = node.sg.func.graph
+	calls = set()
+	parts = [nodeSig(node, {}, calls)]
+	seen  = set()
+
+	while calls:
+		name = calls.pop()
+		if name in seen: continue
+		seen.add(name)
+
+		sig, other = funcSig(graph, name, sigs)
+		parts.append('%s=%s' % (name, sig))
+		calls |= other
+
+	return hashlib.sha1('\n'.join(sorted(parts))).hexdigest()
+
+# ----- #
+# Cache #
+# ----- #
+
+def cacheDir():
+	home = os.path.join(os.path.expanduser('~'), '.cache')
+	return os.path.join(os.environ.get('XDG_CACHE_HOME', home), 'dlc')
+
+class Cache(object):
+	def __init__(self, path = None, size = 4096):
+		self.path    = path or os.path.join(cacheDir(), 'constants.json')
+		self.size    = size
+		self.entries = collections.OrderedDict()
+		self.changed = False
+		self.load()
+
+	def __contains__(self, key):
+		return key in self.entries
+
+	def __getitem__(self, key):
+		val = self.entries.pop(key)
+		self.entries[key] = val
+		return val
+
+	def __setitem__(self, key, val):
+		self.entries.pop(key, None)
+		self.entries[key] = val
+		self.changed = True
+
+		while len(self.entries) > self.size:
+			self.entries.popitem(last = False)
+
+	def load(self):
+		try:
+			with open(self.path, 'r') as f:
+				for key, val in json.load(f):
+					self.entries[key] = val
+		except (IOError, ValueError, TypeError):
+			self.entries.clear()
+
+		while len(self.entries) > self.size:
+			self.entries.popitem(last = False)
+
+	def save(self):
+		if not self.changed: return
+		dir = os.path.dirname(self.path)
+
+		try:
+			if not os.path.isdir(dir): os.makedirs(dir)
+			fd, tmp = tempfile.mkstemp(dir = dir)
+			with os.fdopen(fd, 'w') as f:
+				json.dump(self.entries.items(), f)
+			os.rename(tmp, self.path)
+		except (IOError, OSError):
+			return
+
+		self.changed = False
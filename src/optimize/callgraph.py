@@ -0,0 +1,142 @@
+# callgraph.py
+# Mathijs Saey
+# DLC
+
+# This module contains the call graph of a program.
+# The call graph keeps track of the call nodes that call a
+# function and of the call nodes that are contained in a function.
+# It is updated when call nodes are added or removed, which makes
+# it unnecessary to traverse the program after every change.
+
+# The strongly connected components of the call graph are found
+# with Tarjan's algorithm. Functions in a component with more than
+# one function, or which call themselves, are recursive.
+
+def callNodes(sg):
+	res = []
+	for node in sg:
+		if node.isCall(): res.append(node)
+		elif node.isCompound():
+			for inner in node: res += callNodes(inner)
+	return res
+
+class CallGraph(object):
+	def __init__(self, graph):
+		self.graph     = graph
+		self.calls     = {}
+		self.contains  = {}
+		self.component = {}
+
+		for sg in graph: self.addFunction(sg)
+
+	# Updates
+	# -------
+
+	def addFunction(self, sg):
+		self.calls.setdefault(sg.name, [])
+		self.contains.setdefault(sg.name, [])
+		for node in callNodes(sg): self.addCall(node)
+
+	def addCall(self, node):
+		self.calls.setdefault(node.name, []).append(node)
+		self.contains.setdefault(node.sg.func.name, []).append(node)
+
+	def removeCall(self, node):
+		self.calls[node.name].remove(node)
+		self.contains[node.sg.func.name].remove(node)
+
+	# Only used for unreachable functions, the calls
+	# to these functions are removed along with their callers.
+	def removeFunction(self, name):
+		for node in self.contains.pop(name):
+			if node.name in self.calls: self.calls[node.name].remove(node)
+		del self.calls[name]
+		self.graph.delSubGraph(name)
+
+	# Queries
+	# -------
+
+	def callers(self, name):
+		return self.calls.get(name, [])
+
+	def callees(self, name):
+		res = []
+		for node in self.contains[name]:
+			if node.name not in res: res.append(node.name)
+		return res
+
+	def isRecursive(self, name):
+		return self.component.get(name) is not None
+
+	# Strongly connected components, every component
+	# appears after the components it calls.
+	def components(self):
+		index  = {}
+		low    = {}
+		stack  = []
+		onStk  = set()
+		res    = []
+
+		for root in self.contains.iterkeys():
+			if root in index: continue
+			work = [(root, iter(self.callees(root)))]
+			index[root] = low[root] = len(index)
+			stack.append(root)
+			onStk.add(root)
+
+			while work:
+				name, it = work[-1]
+				for callee in it:
+					if callee not in index:
+						index[callee] = low[callee] = len(index)
+						stack.append(callee)
+						onStk.add(callee)
+						work.append((callee, iter(self.callees(callee))))
+						break
+					elif callee in onStk:
+						low[name] = min(low[name], index[callee])
+				else:
+					work.pop()
+					if work:
+						caller = work[-1][0]
+						low[caller] = min(low[caller], low[name])
+					if low[name] == index[name]:
+						scc = []
+						while True:
+							el = stack.pop()
+							onStk.discard(el)
+							scc.append(el)
+							if el == name: break
+						res.append(scc)
+		return res
+
+	# Functions which are part of a cycle in the call graph
+	# are mapped to their component, others are mapped to None.
+	def analyse(self):
+		self.component = {}
+		res = self.components()
+
+		for scc in res:
+			rec = len(scc) > 1 or scc[0] in self.callees(scc[0])
+			for name in scc: self.component[name] = scc if rec else None
+		return res
+
+	# Reachability
+	# ------------
+
+	def reachable(self, root = 'main'):
+		seen  = set([root])
+		stack = [root]
+		while stack:
+			for callee in self.callees(stack.pop()):
+				if callee not in seen:
+					seen.add(callee)
+					stack.append(callee)
+		return seen
+
+	# Remove every function that can not be reached from root.
+	def sweep(self, root = 'main'):
+		live = self.reachable(root)
+		dead = [name for name in self.contains if name not in live]
+		for name in dead: self.removeFunction(name)
+		return dead
@@ -4,19 +4,36 @@
 
 # This module is responsible for the elimination
 # of nodes that only accept literals.
+# Operations are evaluated directly with their python
+# implementation, other nodes (including calls to recursive
+# functions) are evaluated on the graph.
+# When DVM is used, these nodes are converted to DIS instead.
+# Every evaluation is limited by a budget, nodes that exceed
+# it are not folded. The results of these evaluations can be
+# stored in a cache.
+# A node of which every input is a literal is never triggered
+# in DIS, the first input of a node that is not folded is therefore
+# produced by a constant node, which is triggered by the subgraph.
+
+# Folding is driven by a worklist: when a node is folded,
+# only the nodes that use its result are examined again.
+# In batch mode every foldable node on the worklist is
+# evaluated at once, which results in a single DIS program
+# per round when DVM is used.
 
 import backend
 import IGR
+import collections
 
-didChange = True
+import cache as _cache
+import evaluate
 
-def setChange():
-	global didChange
-	didChange = True
+from report  import Report
+from backend import operations
 
-def resetChange():
-	global didChange
-	didChange = False
+evalErrors = (
+	ArithmeticError, LookupError, TypeError, ValueError, RuntimeError,
+	backend.DISError, backend.DVMError, evaluate.EvaluationError)
 
 def isLit(node):
 	for port in node.ports:
@@ -24,47 +41,236 @@ def isLit(node):
 			return False
 	return True
 
-def getVal(node):
-	targets = node.out.targets
-	values = [port.src.val for port in node.ports]
-	for port in node.ports: port.src = None
-	node.out.targets = []
-	dis = backend.convert(node.sg.func.graph, linkTo = node)
-	res = backend.run(values, dis)
-	node.out.targets = targets
-	return res
+def isNative(node):
+	return node.isOp() and operations.has(node.op)
+
+def isConstCall(node):
+	return node.isCall() and node.sg.func.graph[node.name].exit.hasLit()
+
+# Nodes without inputs can not be triggered in DIS,
+# they can only be evaluated on the graph.
+def isFoldable(node, dvm):
+	return isConstCall(node) or (
+		isLit(node) and (node.args > 0 or isNative(node) or not dvm))
+
+# ---------- #
+# Evaluation #
+# ---------- #
+
+def getValues(node):
+	return [port.src.val for port in node.ports]
+
+def evalOperation(node, budget):
+	return budget.apply(node.op, getValues(node))
+
+def evalProgram(nodes, dvm, linkTo, budget):
+	values  = [val for node in nodes for val in getValues(node)]
+	sources = [[port.src for port in node.ports] for node in nodes]
+	targets = [node.out.targets for node in nodes]
+	timeout = budget.time and budget.time * len(nodes)
+
+	for node in nodes:
+		for port in node.ports: port.src = None
+		node.out.targets = []
+
+	dis = backend.convert(nodes[0].sg.func.graph, linkTo = linkTo)
+
+	for node, src, dst in zip(nodes, sources, targets):
+		for port, lit in zip(node.ports, src): port.src = lit
+		node.out.targets = dst
+
+	try:
+		return backend.evaluate(values, dis, dvm, timeout)
+	except backend.DVMTimeout:
+		raise evaluate.BudgetExceeded('time')
 
 def propagate(node, val):
-	lit = IGR.Literal(val, node.out.typ)
+	lit = IGR.Literal(val, node.out.typ or type(val))
 	for target in node.out: 
 		lit.bind(target)
 	for port in node.ports: 
 		if port.src: port.src.removeBound(port)
 	node.remove()
-	setChange()
-
-def node(node):
-	if node.isCall():
-		func = node.sg.func.graph[node.name]
-		if func.exit.hasLit(): return propagate(node, func.exit.src.val)
-	if isLit(node):
-		val = getVal(node)
-		propagate(node, val)
 
-def sg(sg):
-	if (sg.isFunc() and sg.name != 'main') or not sg.exit.hasLit(): return
-	node = IGR.ConstantNode(sg, sg.exit.src.val)
-	node.out.bind(sg.exit)
-	sg.entry[0].bind(node[0])
+# ------ #
+# Folder #
+# ------ #
+
+class Folder(object):
+	def __init__(self, graph, dvm = False, batch = True, 
+		cache = None, budget = None, report = None, failed = None):
+		self.graph  = graph
+		self.dvm    = dvm
+		self.batch  = batch
+		self.cache  = cache
+		self.budget = budget or evaluate.Budget()
+		self.report = report or Report()
+
+		self.queue   = collections.deque()
+		self.queued  = set()
+		self.failed  = set() if failed is None else failed
+		self.removed = set()
+		self.calls   = {}
+
+	# Worklist
+	# --------
+
+	def add(self, node):
+		if node in self.queued or node in self.removed: return
+		self.queued.add(node)
+		self.queue.append(node)
+
+	def take(self):
+		amount = len(self.queue) if self.batch else 1
+		res    = [self.queue.popleft() for i in xrange(0, amount)]
+		self.queued.difference_update(res)
+		return [node for node in res if node not in self.removed]
+
+	def addNode(self, node):
+		if node.isCall(): self.calls.setdefault(node.name, []).append(node)
+		self.add(node)
+
+	# A literal that reaches the exit of a function
+	# makes every call to this function foldable.
+	def addTargets(self, targets):
+		for target in targets:
+			if isinstance(target.node, IGR.Node):
+				self.add(target.node)
+			elif target.node.isFunc() and target.node.name != 'main':
+				for call in self.calls.get(target.node.name, []): self.add(call)
+			else:
+				self.exit(target.node)
+
+	# Compound subgraphs (and main) which return a literal
+	# produce it once their first input arrives.
+	def exit(self, sg):
+		if (sg.isFunc() and sg.name != 'main') or not sg.exit.hasLit(): return
+		if not sg.entry: return
+		node = IGR.ConstantNode(sg, sg.exit.src.val)
+		node.out.bind(sg.exit)
+		sg.entry[0].bind(node[0])
+
+	# A node that is not folded receives its first
+	# input once the first input of its subgraph arrives.
+	def trigger(self, node):
+		sg = node.sg
+		if not sg.entry or not node.ports or not isLit(node): return
+		port = node[0]
+		lit  = port.src
+		lit.removeBound(port)
 
+		const = IGR.ConstantNode(sg, lit.val)
+		const.out.typ = lit.typ
+		const.out.bind(port)
+		sg.entry[0].bind(const[0])
+		self.report.count('constants.triggered')
 
-def remove(graph):
-	while didChange:
-		resetChange()
-		IGR.traverse(graph, 
-			node,
+	# Evaluation
+	# ----------
+
+	def evalNode(self, node, evaluator):
+		if not self.dvm: return evaluator.evaluate(node)
+		return self.budget.check(evalProgram([node], True, node, self.budget))
+
+	# Evaluate fn, a failed evaluation is added to the report.
+	# Failed nodes are remembered, they are not evaluated again.
+	def attempt(self, node, fn, *args):
+		try:
+			return [(node, fn(*args))]
+		except evaluate.BudgetExceeded, e:
+			self.report.count('constants.skipped.%s' % e.kind)
+		except evalErrors:
+			self.report.count('constants.failed')
+		self.failed.add(node)
+		self.trigger(node)
+		return []
+
+	def evalNodes(self, nodes, evaluator):
+		res = []
+		for node in nodes:
+			res += self.attempt(node, self.evalNode, node, evaluator)
+		return res
+
+	# Evaluate every node with a single program,
+	# fall back to separate programs if one of them fails.
+	def evalPrograms(self, nodes, evaluator):
+		try:
+			vals = evalProgram(nodes, True, nodes, self.budget)
+		except evalErrors:
+			return self.evalNodes(nodes, evaluator)
+
+		res = []
+		for node, val in zip(nodes, vals):
+			res += self.attempt(node, self.budget.check, val)
+		return res
+
+	def getVal(self, node):
+		if isConstCall(node):
+			return node.sg.func.graph[node.name].exit.src.val
+		else:
+			return evalOperation(node, self.budget)
+
+	def getVals(self, nodes):
+		res  = []
+		prog = []
+		keys = {}
+		sigs = {}
+
+		for node in nodes:
+			if isConstCall(node) or isNative(node):
+				res += self.attempt(node, self.getVal, node)
+				continue
+
+			if self.cache is not None:
+				keys[node] = _cache.key(node, sigs)
+				if keys[node] in self.cache:
+					res += self.attempt(node, self.budget.check, self.cache[keys[node]])
+					continue
+
+			prog.append(node)
+
+		if not prog: return res
+
+		# The graph changes between rounds, which invalidates
+		# the evaluation order stored by an evaluator.
+		evaluator = evaluate.Evaluator(self.graph, self.budget)
+		if self.dvm: vals = self.evalPrograms(prog, evaluator)
+		else:        vals = self.evalNodes(prog, evaluator)
+
+		if self.cache is not None:
+			for node, val in vals: self.cache[keys[node]] = val
+		return res + vals
+
+	# Folding
+	# -------
+
+	def foldable(self, node):
+		return node not in self.failed and isFoldable(node, self.dvm)
+
+	def fold(self, node, val):
+		targets = list(node.out.targets)
+		propagate(node, val)
+		self.removed.add(node)
+		self.addTargets(targets)
+
+	def step(self):
+		nodes = [node for node in self.take() if self.foldable(node)]
+		vals  = self.getVals(nodes)
+		for node, val in vals: self.fold(node, val)
+		self.report.count('constants.folded', len(vals))
+
+	def run(self):
+		IGR.traverse(self.graph, 
+			self.addNode,
 			lambda x : None,
-			sg,
+			self.exit,
 			lambda x : None,
 			lambda x : None
 		)
+
+		while self.queue: self.step()
+		return self.removed != set()
+
+def remove(graph, dvm = False, batch = True, 
+	cache = None, budget = None, report = None, failed = None):
+	return Folder(graph, dvm, batch, cache, budget, report, failed).run()
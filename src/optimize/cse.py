@@ -5,55 +5,256 @@
 # This module implements common subexpression elimination
 # It does this by looking for nodes with identical inputs and operations.
 
+# Every node is numbered with a key based on its kind and the
+# sources of its inputs. The nodes of a subgraph are visited in
+# topological order, which ensures that the inputs of a node are
+# already replaced by their common counterparts when the node is
+# numbered. A single pass is therefore sufficient.
+
+# The inputs of commutative operations are sorted before they
+# are added to the key, while mirrored comparisons are keyed
+# as their counterpart with swapped inputs. This allows
+# a * b to be recognised as b * a and a < b as b > a.
+
+# Expressions are available in the subgraphs of compound nodes
+# that are nested in the subgraph where they are computed, they
+# are passed to these subgraphs through a port of the compound node.
+# The entry ports of compound subgraphs are therefore replaced by
+# the source of their compound port when a key is created.
+# Expressions which are computed by both branches of an if
+# node are hoisted into the subgraph that contains the if node.
+
 import IGR
+import collections
+
+# Literal values are used in the keys of nodes,
+# arrays are converted into a hashable representation.
+def freeze(val):
+	if isinstance(val, list): return tuple([freeze(el) for el in val])
+	else: return (type(val), val)
+
+# Sources
+# -------
+
+# Subgraph an output port belongs to
+def owner(src):
+	if isinstance(src.node, IGR.Node): return src.node.sg
+	else: return src.node
+
+# Follow the entry ports of compound subgraphs to the source
+# of their compound port. The first entry of a for body contains
+# an element of the array, not the array itself.
+def resolve(src):
+	while src is not None and not src.isLit():
+		sg = src.node
+		if not isinstance(sg, IGR.SubGraph) or sg.isFunc(): break
+		compound = sg.graph
+		if isinstance(compound, IGR.ForNode) and src.idx == 0: break
+		src = compound[src.idx].src
+	return src
+
+# Make src available in sg, the ports of the compound nodes
+# between sg and the subgraph of src are added or reused.
+def importPort(sg, src):
+	if owner(src) is sg: return src
+
+	compound = sg.graph
+	external = importPort(compound.sg, src)
+	start    = 1 if isinstance(compound, IGR.ForNode) else 0
+
+	for port in compound.ports[start:]:
+		if port.src is external:
+			return sg.entry[port.idx]
+
+	compound.addPort()
+	external.bind(compound[-1])
+	return sg.entry[-1]
+
+# ---- #
+# Keys #
+# ---- #
+
+def portKey(port):
+	src = resolve(port.src)
+	if src is None: return None
+	elif src.isLit(): return freeze(src.val)
+	else: return src
+
+commutative = set(['add', 'mul', 'equals', 'notEq', 'and', 'or'])
+
+mirrored = {
+	'more'   : 'less',
+	'moreEq' : 'lessEq'
+}
+
+# Literals are placed before ports, the order
+# only has to be consistent during a single pass.
+def rank(key):
+	if isinstance(key, tuple): return (0, key)
+	else: return (1, id(key))
+
+def opKey(node):
+	keys = [portKey(port) for port in node.ports]
+
+	if node.op in mirrored:
+		return (mirrored[node.op],) + tuple(reversed(keys))
+	elif node.op in commutative:
+		return (node.op,) + tuple(sorted(keys, key = rank))
+	else:
+		return (node.op,) + tuple(keys)
+
+def key(node):
+	if node.isCompound(): return None
+	elif node.isOp(): return ('op',) + opKey(node)
+	elif node.isCall(): kind = ('call', node.name)
+	elif isinstance(node, IGR.ConstantNode): kind = ('cns', freeze(node.val))
+	else: return None
+
+	return kind + tuple([portKey(port) for port in node.ports])
+
+# Use src instead of the result of node
+def redirect(node, src):
+	for target in node.out.targets:
+		src.bind(target)
+	node.out.targets = []
+	for port in node.ports:
+		port.src.removeBound(port)
 
-didChange = True
-
-def setChange():
-	global didChange
-	didChange = True
-
-def resetChange():
-	global didChange
-	didChange = False
-
-def common(n1, n2):
-	if n1 is n2: return
-	elif n1.args is not n2.args: return
-	elif type(n1) is not type(n2): return
-	elif n1.isCall() and n1.name != n2.name: return
-	elif n1.isOp() and n1.op != n2.op: return
-	elif n1.isCompound(): return
-
-	for p1, p2 in zip(n1.ports, n2.ports):
-		if p1.hasLit() and p2.hasLit() and p1.src.val != p2.src.val: return
-		elif not p1.hasLit() and p1.src != p2.src: return
-	return True
-
-def replace(n1, n2):
-	for target in n2.out.targets:
-		n1.out.bind(target)
-	for port in n2.ports:
+# Nodes of a subgraph, every node appears after
+# the nodes of the subgraph it depends on.
+def order(sg):
+	count = {}
+	users = collections.defaultdict(list)
+
+	for node in sg:
+		count[node] = 0
+	for node in sg:
+		for port in node.ports:
+			src = port.src
+			if src is None or src.isLit() or src.node not in count: continue
+			count[node] += 1
+			users[src.node].append(node)
+
+	queue = collections.deque([node for node in sg if count[node] == 0])
+	res   = []
+
+	while queue:
+		node = queue.popleft()
+		res.append(node)
+		for user in users[node]:
+			count[user] -= 1
+			if count[user] == 0: queue.append(user)
+	return res
+
+# ------ #
+# Scopes #
+# ------ #
+
+class Scope(object):
+	def __init__(self, sg, parent = None):
+		self.sg     = sg
+		self.parent = parent
+		self.table  = {}
+
+	def find(self, key):
+		scope = self
+		while scope:
+			if key in scope.table: return scope.table[key]
+			scope = scope.parent
+
+	def add(self, key, node):
+		self.table.setdefault(key, node)
+
+# -------- #
+# Hoisting #
+# -------- #
+
+# Nodes which only depend on ports from outside of sg can be
+# computed outside of it, nodes which only depend on literals
+# are not moved since nothing would trigger them in DIS.
+def isHoistable(node, sg):
+	srcs = [resolve(port.src) for port in node.ports]
+	if None in srcs: return False
+	ports = [src for src in srcs if not src.isLit()]
+	return ports != [] and not sg in [owner(src) for src in ports]
+
+def candidates(sg):
+	res = {}
+	for node in order(sg):
+		k = key(node)
+		if k is not None and isHoistable(node, sg): res.setdefault(k, node)
+	return res
+
+def hoistNode(node, sg):
+	for port in node.ports:
+		src = resolve(port.src)
 		port.src.removeBound(port)
-	n2.remove()
+		if src.isLit(): IGR.Literal(src.val, src.typ).bind(port)
+		else: importPort(sg, src).bind(port)
+
+	node.sg.delNode(node)
+	node.sg = sg
+	sg += node
+
+# Move the expressions computed by both branches of an if node
+# into the subgraph of the if node. Expressions that depend on
+# hoisted expressions can be hoisted in the next round.
+def hoist(node, scope):
+	hoisted = False
+	changed = True
+	while changed:
+		changed = False
+		thn     = candidates(node.thn)
+
+		for el in order(node.els):
+			k = key(el)
+			if k not in thn or not isHoistable(el, node.els): continue
+
+			res     = thn.pop(k)
+			targets = res.out.targets
+			res.out.targets = []
+
+			hoistNode(res, node.sg)
+			importPort(node.thn, res.out).bindMany(targets)
+			redirect(el, importPort(node.els, res.out))
+			node.els.delNode(el)
+
+			scope.add(k, res)
+			changed = hoisted = True
+	return hoisted
+
+# --------- #
+# Numbering #
+# --------- #
+
+def subGraph(sg, parent = None):
+	scope   = Scope(sg, parent)
+	removed = set()
+	changed = False
+
+	for node in order(sg):
+		k = key(node)
+		if k is None: continue
+
+		res = scope.find(k)
+		if res is None:
+			scope.add(k, node)
+		else:
+			redirect(node, importPort(sg, res.out))
+			removed.add(node)
+
+	if removed: sg.nodes = [node for node in sg if node not in removed]
 
-def hasCommon(node, lst):
-	for el in lst:
-		if common(node, el): 
-			replace(node, el)
-			setChange()
+	for node in list(sg.nodes):
+		if not node.isCompound(): continue
+		for inner in node:
+			changed = subGraph(inner, scope) or changed
+		if isinstance(node, IGR.IfNode):
+			changed = hoist(node, scope) or changed
 
-def node(node):
-	hasCommon(node, node.sg)
+	return changed or removed != set()
 
 def eliminate(graph):
-	while didChange:
-		resetChange()
-		IGR.traverse(
-			graph,
-			node,
-			lambda x : None,
-			lambda x : None,
-			lambda x : None,
-			lambda x : None
-		)
\ No newline at end of file
+	changed = False
+	for sg in graph: changed = subGraph(sg) or changed
+	return changed
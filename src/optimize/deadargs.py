@@ -0,0 +1,112 @@
+# deadargs.py
+# Mathijs Saey
+# DLC
+
+# This module removes arguments which are never used.
+# An entry port of a function which has no targets, or which is
+# only passed to the same position of recursive calls (possibly
+# through compound nodes), is removed from the function and from
+# every call to it. Compound nodes lose a port when none
+# of their subgraphs use the matching entry port.
+# The remaining ports are renumbered, the sources of removed ports
+# lose a target, which allows prune to remove them.
+
+# The first port of a compound node (the condition or the array)
+# is always kept, as is the last argument of a function; a call
+# without inputs is never triggered in DIS. For the same reason, a
+# port is kept when it is the only input of a call or compound node
+# which is not a literal. The arguments of main are the interface
+# of the program and are never removed.
+
+import IGR
+
+from callgraph import CallGraph
+
+def renumber(ports):
+	for idx in xrange(0, len(ports)): ports[idx].idx = idx
+
+def removePort(node, idx):
+	port = node.ports.pop(idx)
+	if port.src: port.src.removeBound(port)
+	renumber(node.ports)
+	node.args -= 1
+
+def removeEntry(sg, idx):
+	sg.entry.pop(idx)
+	renumber(sg.entry)
+	sg.args -= 1
+
+# Removing the port would leave a node of which
+# every input is a literal, which DIS never triggers.
+def isTrigger(node, idx):
+	if node[idx].hasLit(): return False
+	for port in node.ports:
+		if port.idx != idx and not port.hasLit(): return False
+	return True
+
+# Recursive calls which only pass an argument to itself
+def isSelf(sg, target, idx):
+	node = target.node
+	return (isinstance(node, IGR.CallNode) and 
+		node.name == sg.name and target.idx == idx)
+
+def isDead(sg, port, idx):
+	for target in port.targets:
+		node = target.node
+		if isSelf(sg, target, idx): continue
+		elif isinstance(node, IGR.CompoundNode) and target.idx > 0:
+			if isTrigger(node, target.idx): return False
+			for inner in node:
+				if not isDead(sg, inner.entry[target.idx], idx): return False
+		else: return False
+	return True
+
+# Once the calls no longer receive the argument, the compound
+# ports which passed it to the recursive calls are unused.
+def function(sg, calls):
+	changed = False
+	for idx in reversed(xrange(0, sg.args)):
+		if sg.args == 1 or not isDead(sg, sg.entry[idx], idx): continue
+
+		callers = list(calls.callers(sg.name))
+		if [node for node in callers if isTrigger(node, idx)]: continue
+
+		for node in callers: removePort(node, idx)
+		compounds(sg)
+		removeEntry(sg, idx)
+		changed = True
+	return changed
+
+def compound(node):
+	changed = False
+	for idx in reversed(xrange(1, node.args)):
+		if [sg for sg in node if sg.entry[idx].targets]: continue
+		if isTrigger(node, idx): continue
+
+		for sg in node: removeEntry(sg, idx)
+		removePort(node, idx)
+		changed = True
+	return changed
+
+def compounds(sg):
+	changed = False
+	for node in sg:
+		if not node.isCompound(): continue
+		for inner in node: changed = compounds(inner) or changed
+		changed = compound(node) or changed
+	return changed
+
+# Removing an argument can make the arguments of the
+# caller unused, the pass is repeated until it is stable.
+def eliminate(graph):
+	calls   = CallGraph(graph)
+	changed = False
+
+	while True:
+		round = False
+		for sg in graph:
+			round = compounds(sg) or round
+			if sg.name != 'main': round = function(sg, calls) or round
+
+		if not round: return changed
+		changed = True
@@ -0,0 +1,213 @@
+# evaluate.py
+# Mathijs Saey
+# DLC
+
+# This module evaluates parts of the IGR at compile time.
+# Nodes are evaluated directly on the graph, which makes it
+# possible to evaluate calls without converting the program.
+# Only the taken branch of an if node is evaluated, which
+# allows recursive functions to be evaluated as well.
+# Every evaluation is bounded by a budget, which limits
+# the amount of evaluated nodes (steps), the wall time and the
+# size of the produced arrays and integers. Evaluation stops once
+# one of these limits is exceeded. Evaluation does not recurse on
+# the python stack, the depth of recursive calls is only limited
+# by the step budget.
+
+import IGR
+import time
+import types
+
+from backend import operations
+
+class EvaluationError(Exception): pass
+
+class BudgetExceeded(EvaluationError):
+	def __init__(self, kind):
+		super(BudgetExceeded, self).__init__("%s budget exceeded" % kind)
+		self.kind = kind
+
+# ------ #
+# Budget #
+# ------ #
+
+# Integers are measured in words of 64 bits
+def words(bits):
+	return 1 + bits // 64
+
+def isInt(val):
+	return isinstance(val, (int, long)) and not isinstance(val, bool)
+
+def size(val):
+	if isinstance(val, list): return len(val) + sum([size(el) for el in val])
+	elif isInt(val): return words(abs(val).bit_length())
+	else: return 1
+
+# Size of the result of an arithmetic operation on
+# integers, None if it can not grow beyond its inputs.
+def estimate(op, inputs):
+	if op not in ('add', 'sub', 'mul') or not all(map(isInt, inputs)): return None
+	bits = [abs(val).bit_length() for val in inputs]
+	if op == 'mul': return words(sum(bits))
+	else: return words(max(bits) + 1)
+
+class Budget(object):
+	def __init__(self, steps = 100000, time = 1.0, size = 10000):
+		self.steps    = steps
+		self.time     = time
+		self.size     = size
+		self.taken    = 0
+		self.deadline = None
+
+	def start(self):
+		self.taken = 0
+		if self.time is not None: self.deadline = time.time() + self.time
+
+	def tick(self):
+		self.taken += 1
+		if self.steps is not None and self.taken > self.steps:
+			raise BudgetExceeded('steps')
+		if self.deadline is not None and self.taken % 64 == 0:
+			if time.time() > self.deadline: raise BudgetExceeded('time')
+
+	def check(self, val):
+		if self.size is not None and size(val) > self.size:
+			raise BudgetExceeded('size')
+		return val
+
+	# Operations which could create large arrays or integers
+	# are checked before they are executed.
+	def apply(self, op, inputs):
+		if self.size is not None:
+			if op == 'range' and inputs[1] - inputs[0] + 1 > self.size:
+				raise BudgetExceeded('size')
+			res = estimate(op, inputs)
+			if res is not None and res > self.size:
+				raise BudgetExceeded('size')
+		return self.check(operations.apply(op, inputs))
+
+def sources(node):
+	res = []
+	for port in node.ports:
+		src = port.src
+		if src is None or src.isLit(): continue
+		if isinstance(src.node, IGR.SubGraph): continue
+		res.append(src.node)
+	return res
+
+# ---------- #
+# Evaluation #
+# ---------- #
+
+# Result of the evaluation of a subgraph
+class Result(object):
+	def __init__(self, val): self.val = val
+
+class Evaluator(object):
+	def __init__(self, graph, budget = None):
+		self.graph  = graph
+		self.budget = budget or Budget(None, None, None)
+		self.orders = {}
+
+		self.handlers = {
+			IGR.OperationNode : self.operation,
+			IGR.ConstantNode  : self.constant,
+			IGR.CallNode      : self.call,
+			IGR.IfNode        : self.ifN,
+			IGR.ForNode       : self.forN
+		}
+
+	# Subgraphs
+	# ---------
+
+	# Nodes that contribute to the exit of a subgraph,
+	# every node appears after the nodes it depends on.
+	def order(self, sg):
+		if sg in self.orders: return self.orders[sg]
+
+		res   = []
+		seen  = set()
+		src   = sg.exit.src
+		stack = []
+
+		if src and not src.isLit() and not isinstance(src.node, IGR.SubGraph):
+			stack.append((src.node, False))
+
+		while stack:
+			node, done = stack.pop()
+			if done:
+				res.append(node)
+				continue
+			if node in seen: continue
+			seen.add(node)
+			stack.append((node, True))
+			for src in sources(node):
+				if src not in seen: stack.append((src, False))
+
+		self.orders.update({sg : res})
+		return res
+
+	def value(self, port, args, vals):
+		src = port.src
+		if   src is None: raise EvaluationError("Unbound port")
+		elif src.isLit(): return src.val
+		elif isinstance(src.node, IGR.SubGraph): return args[src.idx]
+		else: return vals[src.node]
+
+	# Subgraphs are evaluated by generators, which yield the
+	# generators of the subgraphs they need and receive their result.
+	# This keeps deep recursion off the python stack.
+	def subGraph(self, sg, args):
+		vals = {}
+		for node in self.order(sg):
+			self.budget.tick()
+			inputs = [self.value(port, args, vals) for port in node.ports]
+			res    = self.handlers[type(node)](node, inputs)
+			if isinstance(res, types.GeneratorType): res = yield res
+			vals[node] = res
+		yield Result(self.value(sg.exit, args, vals))
+
+	def run(self, gen):
+		stack = [gen]
+		val   = None
+		while True:
+			res = stack[-1].send(val)
+			if isinstance(res, Result):
+				stack.pop()
+				if not stack: return res.val
+				val = res.val
+			else:
+				stack.append(res)
+				val = None
+
+	# Nodes
+	# -----
+
+	def operation(self, node, inputs):
+		return self.budget.apply(node.op, inputs)
+
+	def constant(self, node, inputs):
+		return node.val
+
+	def call(self, node, inputs):
+		return self.subGraph(self.graph[node.name], inputs)
+
+	def ifN(self, node, inputs):
+		if inputs[0]: return self.subGraph(node.thn, inputs)
+		else:         return self.subGraph(node.els, inputs)
+
+	def forN(self, node, inputs):
+		res = []
+		for el in inputs[0]:
+			res.append((yield self.subGraph(node.body, [el] + inputs[1:])))
+		yield Result(self.budget.check(res))
+
+	# Evaluate a node of which every input is a literal
+	def evaluate(self, node):
+		self.budget.start()
+		self.budget.tick()
+		inputs = [self.value(port, None, None) for port in node.ports]
+		res    = self.handlers[type(node)](node, inputs)
+
+		if isinstance(res, types.GeneratorType): res = self.run(res)
+		return self.budget.check(res)
@@ -0,0 +1,70 @@
+# fusion.py
+# Mathijs Saey
+# DLC
+
+# This module fuses for nodes. A for node which iterates over
+# the result of another for node, which is not used elsewhere,
+# is merged into that for node. The body of the consumer is moved
+# into the body of the producer, where it receives the element
+# produced by the original body instead of an element of the
+# intermediate array. The fused node iterates over the array of the
+# producer (such as an array or range operation) and produces the
+# result of the consumer, the intermediate array is never built.
+
+# Ports of the consumer are imported into the body of the producer,
+# ports which pass the same source are shared.
+
+import IGR
+
+from cse    import importPort
+from splice import move, detach
+
+# For node that produces the array of node, if it can be fused
+def producer(node):
+	src = node[0].src
+	if src is None or src.isLit(): return None
+
+	prod = src.node
+	if not isinstance(prod, IGR.ForNode): return None
+	if prod.out.targets != [node[0]]: return None
+	return prod
+
+def fuseNode(node, prod):
+	body     = prod.body
+	captured = [port.src for port in node.ports[1:]]
+	targets  = node.out.targets
+	node.out.targets = []
+	detach(node)
+
+	el = body.exit.src
+	el.removeBound(body.exit)
+
+	sources = [el] + [
+		IGR.Literal(src.val, src.typ) if src.isLit() else importPort(body, src)
+		for src in captured]
+
+	res = move(node.body, body, sources)
+	res.bind(body.exit)
+	prod.out.bindMany(targets)
+
+def collect(node, lst):
+	if isinstance(node, IGR.ForNode): lst.append(node)
+
+def fuse(graph):
+	nodes = []
+	IGR.traverse(
+		graph,
+		lambda x : collect(x, nodes),
+		lambda x : None,
+		lambda x : None,
+		lambda x : None,
+		lambda x : None
+	)
+
+	changed = False
+	for node in nodes:
+		prod = producer(node)
+		if prod is None: continue
+		fuseNode(node, prod)
+		changed = True
+	return changed
@@ -0,0 +1,74 @@
+# ipcp.py
+# Mathijs Saey
+# DLC
+
+# This module propagates constants between functions.
+# When every call to a function passes the same literal for an
+# argument, the literal is bound to the targets of the matching
+# entry port of the function. The entry port is removed from the
+# function and the literal input is removed from every call.
+# Recursive calls which pass the argument on to the same position,
+# possibly through compound nodes, do not prevent the propagation.
+# Other passes can then fold the literal into the body of the function.
+
+# The last argument of a function is kept, since a call without
+# inputs is never triggered in DIS. The arguments of main
+# are the interface of the program and are never removed.
+
+import IGR
+
+from cse       import freeze, resolve
+from deadargs  import removePort, removeEntry
+from callgraph import CallGraph
+
+# Literal passed to argument idx of sg by every call,
+# None if the calls do not agree.
+def constant(sg, calls, idx):
+	res = None
+	for node in calls:
+		src = node[idx].src
+		if src is None: return None
+		elif not src.isLit():
+			if node.name == node.sg.func.name and resolve(src) is sg.entry[idx]: continue
+			return None
+		elif res is None:
+			res = src
+		elif freeze(res.val) != freeze(src.val) or res.typ != src.typ:
+			return None
+	return res
+
+def function(sg, calls):
+	changed = False
+	callers = calls.callers(sg.name)
+	if not callers: return False
+
+	for idx in reversed(xrange(0, sg.args)):
+		if sg.args == 1: break
+		lit = constant(sg, callers, idx)
+		if lit is None: continue
+
+		val, typ = lit.val, lit.typ
+		for node in list(callers): removePort(node, idx)
+
+		entry   = sg.entry[idx]
+		targets = entry.targets
+		entry.targets = []
+		IGR.Literal(val, typ).bindMany(targets)
+		removeEntry(sg, idx)
+		changed = True
+	return changed
+
+# Propagating a literal into a function can turn
+# the arguments of its calls into literals, the pass
+# is repeated until it is stable.
+def propagate(graph):
+	calls   = CallGraph(graph)
+	changed = False
+
+	while True:
+		round = False
+		for sg in graph:
+			if sg.name != 'main': round = function(sg, calls) or round
+
+		if not round: return changed
+		changed = True
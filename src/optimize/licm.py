@@ -0,0 +1,59 @@
+# licm.py
+# Mathijs Saey
+# DLC
+
+# This module implements loop invariant code motion.
+# Nodes in the body of a for node which do not depend on
+# the element of the array (the first entry of the body) produce
+# the same result for every element. These nodes are moved into
+# the subgraph that contains the for node and their result is
+# passed to the body through a new port of the for node.
+# Moved nodes are evaluated even if the array is empty, operations
+# which can fail (such as a division by zero) and calls are therefore
+# only moved when the array is known to contain elements.
+
+# Nested for nodes are handled before the for nodes that
+# contain them, which allows nodes to move out of several
+# bodies at once.
+
+import IGR
+
+from cse   import order, isHoistable, hoistNode, importPort
+from shape import length
+
+partial = ('div', 'arrGet')
+
+def isTotal(node):
+	if node.isOp(): return node.op not in partial
+	else: return isinstance(node, IGR.ConstantNode)
+
+def body(node):
+	changed = False
+	filled  = (length(node[0].src) or 0) > 0
+
+	for el in order(node.body):
+		if el.isCompound() or not isHoistable(el, node.body): continue
+		if not (filled or isTotal(el)): continue
+
+		targets = el.out.targets
+		el.out.targets = []
+
+		hoistNode(el, node.sg)
+		importPort(node.body, el.out).bindMany(targets)
+		changed = True
+	return changed
+
+def subGraph(sg):
+	changed = False
+	for node in list(sg.nodes):
+		if not node.isCompound(): continue
+		for inner in node:
+			changed = subGraph(inner) or changed
+		if isinstance(node, IGR.ForNode):
+			changed = body(node) or changed
+	return changed
+
+def hoist(graph):
+	changed = False
+	for sg in graph: changed = subGraph(sg) or changed
+	return changed
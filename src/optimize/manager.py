@@ -0,0 +1,105 @@
+# manager.py
+# Mathijs Saey
+# DLC
+
+# This module contains the pass manager, which runs
+# the optimizations of a pipeline in order.
+
+# Passes are registered with a name and a function which accepts
+# the graph and the options of the manager. Every pass returns
+# True when it changed the graph. A pipeline is a list of pass names
+# and groups, a group which repeats runs its steps until none of
+# them changes the graph, or until it reaches its iteration limit.
+
+# The manager adds the following statistics to the report:
+#	- pass.<name>.runs: the amount of times the pass ran
+#	- pass.<name>.time: the wall time spent in the pass
+#	- pass.<name>.nodes: the change in node count caused by the pass
+#	- group.<name>.iterations: the amount of iterations of a group
+
+import re
+import time
+import collections
+
+from report     import Report
+from autoinline import size as sgSize
+
+passes = collections.OrderedDict()
+
+def register(name, fn):
+	passes[name] = fn
+
+class Group(object):
+	def __init__(self, name, steps, repeat = True, limit = 8):
+		self.name   = name
+		self.steps  = steps
+		self.repeat = repeat
+		self.limit  = limit
+
+# Pipelines can also be described by a string such as
+# "[constants,sccp],cse,prune", where brackets create
+# a group which is repeated until it is stable.
+def parse(spec):
+	stack = [[]]
+	for token in re.findall(r'\[|\]|[^\[\],\s]+', spec):
+		if token == '[':
+			stack.append([])
+		elif token == ']':
+			if len(stack) == 1: raise ValueError("Unbalanced ']' in %s" % spec)
+			steps = stack.pop()
+			stack[-1].append(Group('group%d' % len(stack[-1]), steps))
+		elif token not in passes:
+			raise ValueError("Unknown pass: %s" % token)
+		else:
+			stack[-1].append(token)
+
+	if len(stack) != 1: raise ValueError("Unbalanced '[' in %s" % spec)
+	return stack[0]
+
+def size(graph):
+	res = 0
+	for sg in graph: res += sgSize(sg)
+	return res
+
+class Options(object):
+	def __init__(self, **kwargs):
+		self.__dict__.update(kwargs)
+
+class Manager(object):
+	def __init__(self, pipeline, options, skip = (), report = None):
+		self.pipeline = pipeline
+		self.options  = options
+		self.skip     = set(skip)
+		self.report   = report or Report()
+
+	def runPass(self, graph, name):
+		if name in self.skip: return False
+
+		before  = size(graph)
+		start   = time.time()
+		changed = passes[name](graph, self.options)
+
+		self.report.count('pass.%s.runs' % name)
+		self.report.count('pass.%s.time' % name, time.time() - start)
+		self.report.count('pass.%s.nodes' % name, size(graph) - before)
+		return bool(changed)
+
+	def runGroup(self, graph, group):
+		res = False
+		for i in xrange(0, group.limit):
+			self.report.count('group.%s.iterations' % group.name)
+			changed = self.runSteps(graph, group.steps)
+			res     = res or changed
+			if not (group.repeat and changed): break
+		return res
+
+	def runSteps(self, graph, steps):
+		changed = False
+		for step in steps:
+			if isinstance(step, Group): res = self.runGroup(graph, step)
+			else:                       res = self.runPass(graph, step)
+			changed = res or changed
+		return changed
+
+	def run(self, graph):
+		return self.runSteps(graph, self.pipeline)
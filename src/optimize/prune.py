@@ -5,21 +5,49 @@
 # This optimization removes unbound nodes
 # from the program
 
+# Every node without targets is added to a worklist.
+# When a node is removed, the nodes that provide its inputs
+# are added to the worklist once they lose their last target.
+# Removing a compound node removes its subgraphs as well.
+
 import IGR
+import collections
+
+class Pruner(object):
+	def __init__(self):
+		self.queue   = collections.deque()
+		self.removed = collections.defaultdict(set)
+
+	def add(self, node):
+		if not node.out.isBound(): self.queue.append(node)
+
+	def remove(self, node):
+		self.removed[node.sg].add(node)
+
+		for port in node.ports:
+			src = port.src
+			if src is None: continue
+			src.removeBound(port)
+			if not src.isLit() and isinstance(src.node, IGR.Node): self.add(src.node)
+
+	def run(self):
+		while self.queue:
+			node = self.queue.popleft()
+			if node in self.removed[node.sg] or node.out.isBound(): continue
+			self.remove(node)
 
-def node(x):
-	if not x.out.isBound():
-		x.sg.delNode(x)
-		for port in x.ports:
-			port.src.removeBound(port)
-		prune(x.sg.func.graph)
+		for sg, nodes in self.removed.iteritems():
+			if nodes: sg.nodes = [node for node in sg if node not in nodes]
+		return any(self.removed.itervalues())
 
 def prune(graph):
+	pruner = Pruner()
 	IGR.traverse(
 		graph,
-		lambda x : node(x),
+		pruner.add,
 		lambda x : None,
 		lambda x : None,
 		lambda x : None,
 		lambda x : None
-	)
\ No newline at end of file
+	)
+	return pruner.run()
@@ -0,0 +1,30 @@
+# report.py
+# Mathijs Saey
+# DLC
+
+# This module contains the compile report, which keeps
+# track of statistics gathered by the optimizations.
+# Optimizations can also add notes about the decisions they make.
+
+import collections
+
+class Report(object):
+	def __init__(self):
+		self.counters = collections.OrderedDict()
+		self.notes    = []
+
+	def __getitem__(self, key):
+		return self.counters.get(key, 0)
+
+	def count(self, key, amount = 1):
+		self.counters[key] = self[key] + amount
+
+	def note(self, msg):
+		self.notes.append(msg)
+
+	def __str__(self):
+		lines = [
+			("%s: %.3f" if isinstance(val, float) else "%s: %s") % (key, val)
+			for key, val in self.counters.iteritems()]
+		lines = lines + self.notes
+		return '\n'.join(lines)
@@ -0,0 +1,78 @@
+# sccp.py
+# Mathijs Saey
+# DLC
+
+# This module implements sparse conditional constant propagation.
+# Literals are propagated through operations and into the subgraphs
+# of compound nodes. If nodes with a known condition are replaced
+# by the contents of the branch they would take.
+
+import IGR
+
+import constants
+import evaluate
+
+from splice   import splice
+from worklist import Worklist
+
+# ---------- #
+# Propagator #
+# ---------- #
+
+class Propagator(Worklist):
+	def __init__(self, budget):
+		super(Propagator, self).__init__()
+		self.budget = budget
+
+	# Nodes
+	# -----
+
+	def operation(self, node):
+		if not (constants.isNative(node) and constants.isLit(node)): return
+
+		try:
+			val = constants.evalOperation(node, self.budget)
+		except constants.evalErrors:
+			return
+
+		targets = list(node.out.targets)
+		constants.propagate(node, val)
+		self.remove(node)
+		self.addTargets(targets)
+
+	def branch(self, node):
+		taken   = node.thn if node[0].src.val else node.els
+		targets = list(node.out.targets)
+		inner   = splice(node, taken)
+		self.remove(node)
+
+		for el in inner: self.add(el)
+		self.addTargets(targets)
+
+	# The first port of a for node contains the array,
+	# which is not passed to the body.
+	def entries(self, node):
+		start = 1 if isinstance(node, IGR.ForNode) else 0
+
+		for port in node.ports[start:]:
+			if not port.hasLit(): continue
+
+			for sg in node:
+				entry   = sg.entry[port.idx]
+				targets = entry.targets
+				entry.targets = []
+
+				port.src.bindMany(targets)
+				self.addTargets(targets)
+				if targets: self.changed = True
+
+	def node(self, node):
+		if node.isOp():
+			self.operation(node)
+		elif isinstance(node, IGR.IfNode) and node[0].hasLit():
+			self.branch(node)
+		elif node.isCompound():
+			self.entries(node)
+
+def propagate(graph, budget = None):
+	return Propagator(budget or evaluate.Budget()).runGraph(graph)
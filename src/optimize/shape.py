@@ -0,0 +1,102 @@
+# shape.py
+# Mathijs Saey
+# DLC
+
+# This module folds array operations of which the result
+# follows from the shape of the array. The length of an array is
+# known when it is created by an array operation (the amount of inputs),
+# by a range of which the bounds differ by a known amount, or by a for
+# node of which the length of the input array is known. arrLen operations
+# on such arrays are replaced by a literal. arrGet operations with a
+# literal index on an array operation are replaced by the source of the
+# element. The replaced nodes lose their targets and are removed by prune,
+# as are the arrays which are no longer used.
+
+# The DVM has no max operation, the length of a range is therefore only
+# folded when it does not depend on the runtime values of its bounds.
+
+import IGR
+
+from cse      import resolve, importPort
+from worklist import Worklist
+
+# Source which is the base of src, along with
+# the literal integer that is added to it.
+def offset(src):
+	src  = resolve(src)
+	node = src.node if src is not None and not src.isLit() else None
+	if not isinstance(node, IGR.OperationNode) or node.op not in ('add', 'sub'):
+		return src, 0
+
+	p1, p2 = node.ports
+	if p2.hasLit() and type(p2.src.val) is int:
+		return resolve(p1.src), p2.src.val if node.op == 'add' else -p2.src.val
+	elif p1.hasLit() and type(p1.src.val) is int and node.op == 'add':
+		return resolve(p2.src), p1.src.val
+	return src, 0
+
+def rangeLength(node):
+	(b1, k1), (b2, k2) = offset(node[0].src), offset(node[1].src)
+
+	if b1 is None or b2 is None:
+		return None
+	elif b1.isLit() and b2.isLit():
+		if type(b1.val) is not int or type(b2.val) is not int: return None
+		k1, k2 = k1 + b1.val, k2 + b2.val
+	elif b1 is not b2:
+		return None
+	return max(k2 - k1 + 1, 0)
+
+# Source of the element of an arrGet node, None if unknown.
+def element(node):
+	arr, idx = node.ports
+	if arr.src is None or not idx.hasLit() or type(idx.src.val) is not int:
+		return None
+
+	src = resolve(arr.src)
+	if src is None or src.isLit() or not isinstance(src.node, IGR.OperationNode):
+		return None
+	elif src.node.op != 'array' or not 0 <= idx.src.val < src.node.args:
+		return None
+	return src.node[idx.src.val].src
+
+# Length of the array produced by src, None if unknown.
+def length(src):
+	src = resolve(src)
+	if src is None: return None
+	elif src.isLit(): return len(src.val) if isinstance(src.val, list) else None
+
+	node = src.node
+	if isinstance(node, IGR.ForNode):
+		return length(node[0].src)
+	elif not isinstance(node, IGR.OperationNode):
+		return None
+	elif node.op == 'array':
+		return node.args
+	elif node.op == 'range':
+		return rangeLength(node)
+	elif node.op == 'arrGet':
+		el = element(node)
+		return None if el is None else length(el)
+
+def simplify(node):
+	if node.op == 'arrLen' and node[0].src is not None:
+		res = length(node[0].src)
+		if res is not None: return IGR.Literal(res, int)
+	elif node.op == 'arrGet':
+		res = element(node)
+		if res is None: return None
+		elif res.isLit(): return IGR.Literal(res.val, res.typ)
+		else: return importPort(node.sg, res)
+
+class Folder(Worklist):
+	def accepts(self, node):
+		return node.isOp()
+
+	def node(self, node):
+		if not node.out.targets: return
+		res = simplify(node)
+		if res is not None: self.replace(node, res)
+
+def fold(graph):
+	return Folder().runGraph(graph)
@@ -0,0 +1,106 @@
+# specialise.py
+# Mathijs Saey
+# DLC
+
+# This module specialises functions for the literal arguments
+# they receive. A call which passes literals for some arguments
+# and ports for others is redirected to a copy of the function
+# in which the literals are bound to the matching entry ports.
+# These entry ports are removed from the copy and the literal
+# inputs are removed from the call. The copies are cached by the
+# name of the function and the literal arguments, calls with
+# the same pattern share a copy. Other passes can then fold
+# the literals into the body of the copy.
+
+# Calls inside a copy are specialised as well, which allows
+# recursive calls that pass the same literal to call the copy.
+# The amount of copies of a function is limited.
+
+# A function must be converted before the functions that call it.
+# A copy is therefore added right before the function containing
+# the call it was created for, and calls are only redirected to
+# copies that appear before them. Recursive calls in the original
+# function are not specialised, since the copy would have to appear
+# both before and after the original.
+
+import IGR
+import collections
+
+from cse       import freeze
+from deadargs  import removePort, removeEntry
+from callgraph import CallGraph, callNodes
+
+def pattern(node):
+	return tuple([
+		(port.idx, freeze(port.src.val))
+		for port in node.ports if port.hasLit()])
+
+class Specialiser(object):
+	def __init__(self, graph, limit):
+		self.graph  = graph
+		self.limit  = limit
+		self.copies = {}
+		self.counts = collections.defaultdict(int)
+		self.queue  = collections.deque()
+
+	def name(self, name):
+		idx = self.counts[name]
+		while '%s_%d' % (name, idx) in self.graph: idx += 1
+		return '%s_%d' % (name, idx)
+
+	def position(self, sg):
+		return self.graph.subGraphs.index(sg)
+
+	def create(self, node):
+		sg   = self.graph[node.name]
+		copy = sg.copy()
+		name = self.name(node.name)
+
+		copy.name = name
+		self.graph.addSubGraph(copy, name, self.position(node.sg.func))
+		self.counts[node.name] += 1
+
+		for port in reversed([port for port in node.ports if port.hasLit()]):
+			entry   = copy.entry[port.idx]
+			targets = entry.targets
+			entry.targets = []
+			IGR.Literal(port.src.val, port.src.typ).bindMany(targets)
+			removeEntry(copy, port.idx)
+
+		self.queue.extend(callNodes(copy))
+		return copy
+
+	def call(self, node):
+		caller = node.sg.func
+		if node.name in ('main', caller.name): return False
+		if caller.name not in self.graph: return False
+
+		lits = pattern(node)
+		if not lits or len(lits) == node.args: return False
+
+		key = (node.name, lits)
+		if key in self.copies:
+			copy = self.copies[key]
+			if copy is not caller and self.position(copy) > self.position(caller):
+				return False
+		elif self.counts[node.name] >= self.limit:
+			return False
+		else:
+			self.copies[key] = self.create(node)
+
+		for idx, val in reversed(lits): removePort(node, idx)
+		node.name = self.copies[key].name
+		return True
+
+	def run(self):
+		for sg in list(self.graph): self.queue.extend(callNodes(sg))
+
+		changed = False
+		while self.queue:
+			changed = self.call(self.queue.popleft()) or changed
+
+		if changed: CallGraph(self.graph).sweep()
+		return changed
+
+def specialise(graph, limit = 4):
+	return Specialiser(graph, limit).run()
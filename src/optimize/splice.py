@@ -0,0 +1,44 @@
+# splice.py
+# Mathijs Saey
+# DLC
+
+# This module contains functionality to move the nodes
+# of a subgraph into another subgraph.
+
+def setFunc(sg, func):
+	for node in sg:
+		if node.isCompound():
+			for sub in node:
+				sub.func = func
+				setFunc(sub, func)
+
+# Move the nodes of sg into parent, the targets of every
+# entry port of sg are bound to the matching source.
+# Returns the source which produced the result of sg.
+def move(sg, parent, sources):
+	setFunc(sg, parent.func)
+	for node in sg.nodes:
+		node.sg = parent
+		parent += node
+
+	for entry, src in zip(sg.entry, sources):
+		targets = entry.targets
+		entry.targets = []
+		src.bindMany(targets)
+
+	res = sg.exit.src
+	if not res.isLit(): res.removeBound(sg.exit)
+	return res
+
+def detach(node):
+	for port in node.ports:
+		if port.src: port.src.removeBound(port)
+	node.remove()
+
+# Replace a compound node by the contents of one of its subgraphs
+def splice(node, sg):
+	sources = [port.src for port in node.ports]
+	res     = move(sg, node.sg, sources)
+	res.bindMany(node.out.targets)
+	detach(node)
+	return sg.nodes
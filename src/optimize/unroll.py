@@ -0,0 +1,79 @@
+# unroll.py
+# Mathijs Saey
+# DLC
+
+# This optimization unrolls for nodes of which the
+# input array is known at compile time. This is the case when
+# the array is a literal, an array operation or a range with
+# literal bounds. When the amount of elements does not exceed
+# a threshold, the for node is replaced by a copy of its
+# body for every element, the results of these copies
+# are gathered with a single array operation.
+
+import IGR
+
+from splice import move, detach
+
+# Sources which produce the elements of the array
+# that is accepted by a for node, None if unknown.
+def elements(node):
+	src = node[0].src
+
+	if src.isLit():
+		if not isinstance(src.val, list): return None
+		return [IGR.Literal(val, type(val)) for val in src.val]
+
+	el = src.node
+	if not isinstance(el, IGR.OperationNode): return None
+
+	if el.op == 'array':
+		return [port.src for port in el.ports]
+	elif el.op == 'range' and el[0].hasLit() and el[1].hasLit():
+		start, stop = el[0].src.val, el[1].src.val
+		if not isinstance(start, int) or not isinstance(stop, int): return None
+		if stop - start + 1 > 0:
+			return [IGR.Literal(i, int) for i in xrange(start, stop + 1)]
+		return []
+
+def unrollNode(node, threshold):
+	els = elements(node)
+	if els is None or len(els) > threshold: return False
+
+	if not els:
+		lit = IGR.Literal([], list)
+		lit.bindMany(node.out.targets)
+		detach(node)
+		return True
+
+	arr = IGR.OperationNode(node.sg, 'array', len(els))
+	arr.out.typ = list
+	captured = [port.src for port in node.ports[1:]]
+
+	for idx in xrange(0, len(els)):
+		body = node.body.copy()
+		res  = move(body, node.sg, [els[idx]] + captured)
+		res.bind(arr[idx])
+
+	arr.out.bindMany(node.out.targets)
+	detach(node)
+	return True
+
+def collect(node, lst):
+	if isinstance(node, IGR.ForNode): lst.append(node)
+
+# Nested for nodes are unrolled before the nodes that contain them
+def unroll(graph, threshold = 8):
+	nodes = []
+	IGR.traverse(
+		graph,
+		lambda x : collect(x, nodes),
+		lambda x : None,
+		lambda x : None,
+		lambda x : None,
+		lambda x : None
+	)
+
+	changed = False
+	for node in reversed(nodes):
+		if unrollNode(node, threshold): changed = True
+	return changed
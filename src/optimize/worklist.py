@@ -0,0 +1,67 @@
+# worklist.py
+# Mathijs Saey
+# DLC
+
+# This module contains the worklist shared by the passes
+# which examine nodes again when one of their inputs changes.
+# A pass implements node, which examines a single node. Nodes
+# which are removed by the pass are never examined again.
+
+import IGR
+import collections
+
+class Worklist(object):
+	def __init__(self):
+		self.queue   = collections.deque()
+		self.queued  = set()
+		self.removed = set()
+		self.changed = False
+
+	# Nodes which are examined by the pass
+	def accepts(self, node):
+		return True
+
+	def add(self, node):
+		if node in self.queued or node in self.removed: return
+		if not self.accepts(node): return
+		self.queued.add(node)
+		self.queue.append(node)
+
+	def addTargets(self, targets):
+		for target in targets:
+			if isinstance(target.node, IGR.Node): self.add(target.node)
+
+	def remove(self, node):
+		self.removed.add(node)
+		self.changed = True
+
+	# Bind the targets of node to src, the node
+	# can be removed by prune afterwards.
+	def replace(self, node, src):
+		targets = node.out.targets
+		node.out.targets = []
+		src.bindMany(targets)
+		self.changed = True
+		self.addTargets(targets)
+
+	def node(self, node):
+		raise NotImplementedError
+
+	def run(self):
+		while self.queue:
+			node = self.queue.popleft()
+			self.queued.discard(node)
+			if node not in self.removed: self.node(node)
+		return self.changed
+
+	# Examine every node of the graph
+	def runGraph(self, graph):
+		IGR.traverse(
+			graph,
+			self.add,
+			lambda x : None,
+			lambda x : None,
+			lambda x : None,
+			lambda x : None
+		)
+		return self.run()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+# bench.py
+# Mathijs Saey
+# DLC
+
+# This file measures the time it takes to inline a call.
+# Callees of various sizes are inlined in a program which also
+# contains a large function that is not involved in the inlining.
+# The time per call site should only depend on the size of
+# the callee, not on the size of the rest of the program.
+# Like timeit, garbage collection is disabled while timing.
+
+import gc
+import sys
+import time
+
+sys.path.insert(0, "../src")
+
+import IGR
+from optimize import autoinline
+from optimize.callgraph import CallGraph
+
+CALLS   = 20
+SIZES   = [10, 100, 1000]
+BALLAST = 20000
+
+# Function which adds 1 to its argument size times
+def function(graph, name, size):
+	sg = IGR.SubGraph()
+	sg.name = name
+	graph.addSubGraph(sg, name)
+
+	src = sg.addParSlot()
+	for i in xrange(0, size):
+		node = IGR.OperationNode(sg, 'add', 2)
+		src.bind(node[0])
+		IGR.Literal(1, int).bind(node[1])
+		src = node.out
+
+	src.bind(sg.exit)
+	return sg
+
+def program(size):
+	graph = IGR.Graph()
+	function(graph, 'ballast', BALLAST)
+	function(graph, 'callee', size)
+
+	main = IGR.SubGraph()
+	main.name = 'main'
+	graph.addSubGraph(main, 'main')
+	src = main.addParSlot()
+
+	for i in xrange(0, CALLS):
+		node = IGR.CallNode(main, 'callee', 1)
+		src.bind(node[0])
+		src = node.out
+
+	src.bind(main.exit)
+	return graph
+
+def bench(size):
+	graph = program(size)
+	calls = CallGraph(graph)
+	sites = list(calls.callers('callee'))
+
+	gc.disable()
+	start = time.time()
+	for node in sites: autoinline.insert(graph['callee'], node, calls)
+	res = time.time() - start
+	gc.enable()
+	return res / len(sites)
+
+if __name__ == '__main__':
+	print "%8s %16s %16s" % ("size", "ms per call", "us per node")
+	for size in SIZES:
+		res = bench(size)
+		print "%8d %16.3f %16.3f" % (size, res * 1e3, res * 1e6 / size)
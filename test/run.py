@@ -5,13 +5,22 @@
 # DLC
 
 # This file compiles and runs the various example files
+# The DVM environment variable can be used to run the
+# tests with another executable, such as stubdvm.py
 
+import os
+import sys
 import unittest
 import subprocess
 
-DVM_PATH  = "dvm"
+sys.path.insert(0, "../src")
+from backend.pool import Pool
+
+DVM_PATH = os.environ.get("DVM", "dvm")
 DLC_PATH = "../src/dlc.py"
 
+pool = Pool(path = DVM_PATH, args = ['-ll', '40'])
+
 class Test(unittest.TestCase):
 
 	def compile(self, path, args = []):
@@ -20,22 +29,41 @@ class Test(unittest.TestCase):
 
 	def runDvm(self, path, inputs):
 		print "Running", path
-		args = [DVM_PATH, path, '-ll', '40']
-
-		for e in inputs:
-			args.append("-i")
-			args.append(str(e))
-
-		return subprocess.check_output(args).strip()
+		return pool.run(inputs, open(path, 'r').read())
 
 	def abstract(self, name, inputs, expected, args = []):
 		self.compile(name + '.dfl', args)
 		res = self.runDvm(name + '.dis', inputs)
 		self.assertEqual(res, expected)
 
+	def abstractMany(self, name, cases, args = []):
+		self.compile(name + '.dfl', args)
+		dis = open(name + '.dis', 'r').read()
+
+		futures = [pool.submit(inputs, dis) for (inputs, _) in cases]
+		for future, (_, expected) in zip(futures, cases):
+			self.assertEqual(future.result(), expected)
+
 	def test_cse(self): self.abstract('cse', ['4', '10'], '4900')
 	def test_fac(self): self.abstract('factorial', ['5'], '120')
 	def test_fib(self): self.abstract('fibonacci', ['10'], '55')
 	def test_for(self): self.abstract('forin', ['1', '10', '3', '4'], '[15, 16, 17, 18, 19, 20, 21, 22, 23, 24]')
 
-unittest.main()
\ No newline at end of file
+	def test_args(self): self.abstract('arguments', ['5'], '31')
+	def test_loop_args(self): self.abstract('loopargs', ['4', '2'], '[1, 2, 3, 4, 5, 6, 7, 8, 9]')
+	def test_budget(self): self.abstract('budget', ['7'], '7')
+	def test_div(self): self.abstract('division', ['5'], '-5')
+	def test_sccp(self): self.abstract('sccp', ['4'], '13')
+	def test_unroll(self): self.abstract('unroll', ['3'], '[3, 6, 9, 12]')
+	def test_algebra(self): self.abstract('algebra', ['5'], '12')
+	def test_specialise(self): self.abstract('specialise', ['3'], '21')
+	def test_ipcp(self): self.abstract('ipcp', ['2'], '15')
+	def test_shape(self): self.abstract('shape', ['4', '10'], '16')
+
+	def test_fac_many(self): self.abstractMany('factorial', [
+		(['0'], '1'), (['1'], '1'), (['6'], '720'), (['10'], '3628800')])
+
+try:
+	unittest.main()
+finally:
+	pool.close()
\ No newline at end of file
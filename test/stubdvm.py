@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+
+# stubdvm.py
+# Mathijs Saey
+# DLC
+
+# This file can stand in for the dvm executable.
+# It accepts the same arguments as dvm and executes
+# the program with the python DIS interpreter of dlc.
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from backend import interpreter
+
+argParser = argparse.ArgumentParser(description = "DVM stand-in")
+argParser.add_argument("path", help = "The path to the program, - reads from stdin")
+argParser.add_argument("-i", dest = "inputs", action = "append", default = [])
+argParser.add_argument("-ll", dest = "logLevel", help = "Ignored")
+args = argParser.parse_args()
+
+if args.path == '-':
+	dis = sys.stdin.read()
+else:
+	dis = open(args.path, 'r').read()
+
+try:
+	print interpreter.run(args.inputs, dis)
+except Exception, e:
+	print >> sys.stderr, e
+	sys.exit(1)